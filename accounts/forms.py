@@ -1,5 +1,6 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
+from . import phones
 from .models import User, SellerProfile
 
 class UserRegistrationForm(UserCreationForm):
@@ -8,7 +9,7 @@ class UserRegistrationForm(UserCreationForm):
         widget=forms.EmailInput(attrs={'class': 'form-control', 'placeholder': 'Enter your email'})
     )
     phone_number = forms.CharField(
-        max_length=15, 
+        max_length=20, 
         required=False,
         widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Enter your phone number'})
     )
@@ -51,6 +52,9 @@ class UserRegistrationForm(UserCreationForm):
         # Make email required
         self.fields['email'].required = True
 
+    def clean_phone_number(self):
+        return phones.clean(self.cleaned_data.get('phone_number'))
+
     def save(self, commit=True):
         user = super().save(commit=False)
         user.email = self.cleaned_data['email']
@@ -81,6 +85,9 @@ class UserUpdateForm(forms.ModelForm):
             'city': 'City',
         }
 
+    def clean_phone_number(self):
+        return phones.clean(self.cleaned_data.get('phone_number'))
+
 class SellerProfileForm(forms.ModelForm):
     class Meta:
         model = SellerProfile
@@ -108,27 +115,7 @@ class PhoneForm(forms.Form):
     )
 
     def clean_phone(self):
-        phone = self.cleaned_data.get('phone')
-        if phone:
-            # Basic phone validation
-            import re
-            # Remove any non-digit characters except +
-            cleaned_phone = re.sub(r'[^\d+]', '', phone)
-
-            # Check if it's a valid Rwandan phone number format
-            if not re.match(r'^(\+?250|0)?[7][0-9]{8}$', cleaned_phone):
-                raise forms.ValidationError("Please enter a valid Rwandan phone number (e.g., +250789123456 or 0789123456)")
-
-            # Format to standard format
-            if cleaned_phone.startswith('0'):
-                cleaned_phone = '+25' + cleaned_phone[1:]
-            elif cleaned_phone.startswith('250'):
-                cleaned_phone = '+' + cleaned_phone
-            elif not cleaned_phone.startswith('+'):
-                cleaned_phone = '+25' + cleaned_phone
-
-            return cleaned_phone
-        return phone
+        return phones.clean(self.cleaned_data.get('phone'))
 
 class LoginForm(forms.Form):
     username = forms.CharField(
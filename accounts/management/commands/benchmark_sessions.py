@@ -0,0 +1,70 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+class Command(BaseCommand):
+    help = "Measure the per-request cost of each session backend, reading only or saving every request"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        engines = getattr(settings, 'SESSION_ENGINES', ENGINES)
+        self.stdout.write(f"{'backend':<16}{'mode':<8}{'ms/request':>12}{'queries/request':>18}")
+        for name, engine in engines.items():
+            for save_every_request in (False, True):
+                elapsed, queries = self.measure(engine, save_every_request, options['requests'])
+                self.stdout.write(
+                    f"{name:<16}{'write' if save_every_request else 'read':<8}"
+                    f"{elapsed * 1000 / options['requests']:>12.3f}{queries / options['requests']:>18.2f}"
+                )
+
+    def measure(self, engine, save_every_request, requests):
+        """Run logged-in requests through SessionMiddleware; returns (seconds, database queries)"""
+        cookie_name = settings.SESSION_COOKIE_NAME
+        factory = RequestFactory()
+
+        def view(request):
+            if SESSION_KEY not in request.session:
+                request.session[SESSION_KEY] = '1'  # Log in once
+            elif save_every_request:
+                request.session.modified = True  # What the views used to do on every page
+            return HttpResponse()
+
+        with override_settings(SESSION_ENGINE=engine):
+            middleware = SessionMiddleware(view)
+            cookie = None
+
+            def get():
+                nonlocal cookie
+                request = factory.get('/')
+                if cookie:
+                    request.COOKIES[cookie_name] = cookie
+                response = middleware(request)
+                if cookie_name in response.cookies:
+                    cookie = response.cookies[cookie_name].value
+
+            get()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(requests):
+                    get()
+                elapsed = time.perf_counter() - start
+
+            import_module(engine).SessionStore(cookie).delete()
+        return elapsed, len(queries)
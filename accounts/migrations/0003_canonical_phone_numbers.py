@@ -0,0 +1,56 @@
+import re
+
+from django.db import migrations
+from django.db.models import Exists, OuterRef, Q, Subquery
+
+NUMBER = re.compile(r'^(?:\+?250|0)?(7\d{8})$')
+# The old form cleaners turned 0788123456 into +25788123456
+LEGACY = re.compile(r'^\+25(7\d{8})$')
+
+
+def canonical(number):
+    cleaned = re.sub(r'[^\d+]', '', number or '')
+    match = NUMBER.match(cleaned) or LEGACY.match(cleaned)
+    return f'+250{match.group(1)}' if match else None
+
+
+def normalize_column(queryset, field):
+    """Rewrite each distinct value of field in one UPDATE; unparseable numbers are left alone"""
+    values = queryset.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+    for value in values.values_list(field, flat=True).distinct().order_by():
+        number = canonical(value)
+        if number and number != value:
+            queryset.filter(**{field: value}).update(**{field: number})
+
+
+def forwards(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Order = apps.get_model('orders', 'Order')
+
+    for field in ('customer_phone', 'shipping_phone', 'mtn_phone'):
+        normalize_column(Order.objects.all(), field)
+
+    # Customers who only ever gave their phone at checkout get the latest valid one
+    with_phone = Order.objects.filter(customer=OuterRef('pk'), customer_phone__startswith='+2507')
+    User.objects.filter(phone_number='').filter(Exists(with_phone)).update(
+        phone_number=Subquery(with_phone.order_by('-created_at').values('customer_phone')[:1])
+    )
+    normalize_column(User.objects.all(), 'phone_number')
+
+    # And orders placed without a phone get the account's
+    account_phone = User.objects.filter(pk=OuterRef('customer_id')).values('phone_number')[:1]
+    Order.objects.filter(Q(customer_phone='') | Q(customer_phone__isnull=True)).exclude(
+        customer__phone_number=''
+    ).update(customer_phone=Subquery(account_phone))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_admin_table_sort_indexes'),
+        ('orders', '0005_admin_table_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
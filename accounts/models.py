@@ -17,6 +17,9 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [models.Index(fields=['date_joined'])]
+
     def __str__(self):
         return f"{self.username} ({self.get_user_type_display()})"
 
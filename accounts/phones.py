@@ -0,0 +1,43 @@
+"""Rwandan phone numbers in one canonical form.
+
+A user's phone lives on User.phone_number, stored as +250 followed by the
+9-digit national number (e.g. +250789123456) whatever spelling was typed.
+Every form that accepts a phone number cleans it with clean(), so equal
+numbers are always equal strings and can be filtered on directly.
+"""
+import re
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from orders.models import Order
+
+COUNTRY_CODE = '250'
+INVALID_MESSAGE = "Please enter a valid Rwandan phone number (e.g., +250789123456 or 0789123456)"
+
+NUMBER = re.compile(r'^(?:\+?250|0)?(7\d{8})$')
+
+
+def normalize(number):
+    """Canonical +250 form of a phone number, or None if it is not a Rwandan mobile number"""
+    match = NUMBER.match(re.sub(r'[^\d+]', '', number or ''))
+    return f'+{COUNTRY_CODE}{match.group(1)}' if match else None
+
+
+def clean(number):
+    """Form field cleaner: the canonical number, '' when blank"""
+    if not number:
+        return ''
+    canonical = normalize(number)
+    if canonical is None:
+        raise ValidationError(INVALID_MESSAGE)
+    return canonical
+
+
+def set_customer_phone(user, phone):
+    """Save a user's phone and fill it into their orders that have none"""
+    Order.objects.filter(
+        Q(customer_phone='') | Q(customer_phone__isnull=True), customer=user
+    ).update(customer_phone=phone)
+    user.phone_number = phone
+    user.save(update_fields=['phone_number', 'updated_at'])  # After the orders, so receivers see both
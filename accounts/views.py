@@ -2,6 +2,7 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
+from . import phones
 from .forms import UserRegistrationForm, LoginForm, UserUpdateForm, SellerProfileForm
 from orders.models import Order
 
@@ -100,22 +101,8 @@ def profile(request):
     """User profile view"""
     from accounts.forms import PhoneForm
 
-    # Initialize variables
-    phone_set = False
-    user_phone = request.session.get('user_phone', '')
-
-    # Check if phone is set in session or in recent orders
-    if user_phone:
-        phone_set = True
-    else:
-        # Check if user has any orders with phone numbers
-        recent_order_with_phone = Order.objects.filter(
-            customer=request.user
-        ).exclude(customer_phone='').order_by('-created_at').first()
-        if recent_order_with_phone:
-            user_phone = recent_order_with_phone.customer_phone
-            request.session['user_phone'] = user_phone
-            phone_set = True
+    user_phone = request.user.phone_number
+    phone_set = bool(user_phone)
 
     # Handle form submission
     if request.method == 'POST':
@@ -129,23 +116,8 @@ def profile(request):
                 seller_form = SellerProfileForm(instance=request.user.seller_profile)
 
             if phone_form.is_valid():
-                phone = phone_form.cleaned_data['phone']
-
-                # Store phone in session
-                request.session['user_phone'] = phone
-                request.session.modified = True
-
-                # Update any recent orders without phone numbers
-                orders_without_phone = Order.objects.filter(
-                    customer=request.user,
-                    customer_phone=''
-                )
-                for order in orders_without_phone:
-                    order.customer_phone = phone
-                    order.save()
-
-                phone_set = True
-                user_phone = phone
+                # Store phone on the account and fill it into orders without one
+                phones.set_customer_phone(request.user, phone_form.cleaned_data['phone'])
                 messages.success(request, 'Phone number saved successfully! Your profile is now complete.')
                 return redirect('accounts:profile')
             else:
@@ -0,0 +1,124 @@
+"""Bulk actions for the admin management tables.
+
+Every action changes all eligible rows with one UPDATE ... WHERE id IN (...),
+creates its notifications with one bulk insert and writes an AdminAction
+audit record, all inside a single transaction. Rows that are not eligible
+(e.g. an order that cannot move to the requested status) are skipped and
+reported back rather than failing the whole action.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from marketplace import kpis, rollups
+from marketplace.models import Product
+from orders.models import Notification, Order
+from .models import AdminAction
+
+
+def parse_ids(values):
+    """Primary keys from POSTed values, ignoring anything that is not an integer"""
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return sorted(ids)
+
+
+def _record(actor, action, target_type, requested, changed, **details):
+    return AdminAction.objects.create(
+        actor=actor,
+        action=action,
+        target_type=target_type,
+        target_ids=changed,
+        requested=len(requested),
+        affected=len(changed),
+        details=details,
+    )
+
+
+def _apply(queryset, changes):
+    """Update queryset in one statement and return the ids it changed"""
+    changed = list(queryset.select_for_update().values_list('pk', flat=True))
+    if changed:
+        queryset.model.objects.filter(pk__in=changed).update(**changes)
+    return changed
+
+
+@transaction.atomic
+def set_users_active(actor, ids, active):
+    changed = _apply(
+        User.objects.filter(pk__in=ids, is_active=not active).exclude(pk=actor.pk),  # Never lock yourself out
+        {'is_active': active, 'updated_at': timezone.now()},
+    )
+    transaction.on_commit(kpis.invalidate)
+    return _record(actor, 'activate' if active else 'deactivate', 'user', ids, changed)
+
+
+@transaction.atomic
+def set_sellers_approved(actor, ids, approved):
+    changed = _apply(
+        User.objects.filter(pk__in=ids, user_type='seller', is_seller_approved=not approved),
+        {'is_seller_approved': approved, 'updated_at': timezone.now()},
+    )
+
+    if approved:
+        notification = {
+            'notification_type': 'order_confirmed',  # Using existing type
+            'title': 'Seller Account Approved',
+            'message': 'Congratulations! Your seller account has been approved. You can now access all seller features.',
+        }
+    else:
+        notification = {
+            'notification_type': 'order_cancelled',  # Using existing type
+            'title': 'Seller Account Unapproved',
+            'message': 'Your seller account has been unapproved. Please contact support for more information.',
+        }
+    Notification.objects.bulk_create(
+        [Notification(user_id=user_id, **notification) for user_id in changed],
+        batch_size=500,
+    )
+
+    transaction.on_commit(kpis.invalidate)
+    return _record(actor, 'approve' if approved else 'unapprove', 'user', ids, changed)
+
+
+@transaction.atomic
+def set_products_active(actor, ids, active):
+    changed = _apply(
+        Product.objects.filter(pk__in=ids, is_active=not active),
+        {'is_active': active, 'updated_at': timezone.now()},
+    )
+    transaction.on_commit(kpis.invalidate)
+    return _record(actor, 'activate' if active else 'deactivate', 'product', ids, changed)
+
+
+@transaction.atomic
+def transition_orders(actor, ids, new_status):
+    """Move orders to new_status where the order state machine allows it"""
+    rows = list(
+        Order.objects.filter(pk__in=ids, status__in=Order.allowed_sources(new_status))
+        .select_for_update()
+        .values_list('pk', 'status', 'customer_id', 'order_number')
+    )
+    changed = [pk for pk, _, _, _ in rows]
+    if changed:
+        Order.objects.filter(pk__in=changed).update(status=new_status, updated_at=timezone.now())
+
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=customer_id,
+            notification_type=f'order_{new_status}',
+            title="Order Status Updated",
+            message=f"Your order #{order_number} status changed from {old_status} to {new_status}",
+            related_order_id=pk,
+        )
+        for pk, old_status, customer_id, order_number in rows
+    ], batch_size=500)
+
+    # update() skips the post_save signals that keep the sales rollups current
+    rollups.refresh_orders(changed)
+    transaction.on_commit(kpis.invalidate)
+    return _record(actor, f'status:{new_status}', 'order', ids, changed, to=new_status)
@@ -1,107 +1,141 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.urls import reverse
 from django.utils.html import format_html
 from accounts.models import User, SellerProfile
 from marketplace.models import Category, Product
 from orders.models import Order, OrderItem
+from . import actions
+from .models import AdminAction
+from .tables import TablePaginator
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """Changelist defaults for tables that can grow to millions of rows
+
+    Skips the unfiltered COUNT(*) shown next to filtered results and counts
+    pages with TablePaginator, which estimates large totals.
+    """
+    show_full_result_count = False
+    paginator = TablePaginator
+
 
 @admin.register(User)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(ScalableAdmin):
     list_display = ['username', 'email', 'user_type', 'is_seller_approved', 'is_active', 'date_joined']
     list_filter = ['user_type', 'is_seller_approved', 'is_active', 'date_joined']
     search_fields = ['username', 'email']
+    ordering = ['username']  # Unique and indexed; also orders seller autocomplete results
     actions = ['approve_sellers', 'unapprove_sellers', 'activate_users', 'deactivate_users']
 
+    def _bulk(self, request, queryset, action, *args):
+        ids = list(queryset.values_list('pk', flat=True))
+        return action(request.user, ids, *args)
+
     def approve_sellers(self, request, queryset):
         """Approve selected sellers"""
-        updated = queryset.filter(user_type='seller').update(is_seller_approved=True)
-        self.message_user(request, f"{updated} seller(s) approved successfully.")
-
-        # Send notifications to approved sellers
-        from orders.models import Notification
-        for user in queryset.filter(user_type='seller'):
-            try:
-                Notification.objects.create(
-                    user=user,
-                    notification_type='order_confirmed',  # Using existing type
-                    title='Seller Account Approved',
-                    message='Congratulations! Your seller account has been approved. You can now access all seller features.',
-                    related_order=None
-                )
-            except:
-                pass  # Skip if notification fails
+        record = self._bulk(request, queryset, actions.set_sellers_approved, True)
+        self.message_user(request, f"{record.affected} seller(s) approved successfully.")
     approve_sellers.short_description = "Approve selected sellers"
 
     def unapprove_sellers(self, request, queryset):
         """Unapprove selected sellers"""
-        updated = queryset.filter(user_type='seller').update(is_seller_approved=False)
-        self.message_user(request, f"{updated} seller(s) unapproved successfully.")
-
-        # Send notifications to unapproved sellers
-        from orders.models import Notification
-        for user in queryset.filter(user_type='seller'):
-            try:
-                Notification.objects.create(
-                    user=user,
-                    notification_type='order_cancelled',  # Using existing type
-                    title='Seller Account Unapproved',
-                    message='Your seller account has been unapproved. Please contact support for more information.',
-                    related_order=None
-                )
-            except:
-                pass  # Skip if notification fails
+        record = self._bulk(request, queryset, actions.set_sellers_approved, False)
+        self.message_user(request, f"{record.affected} seller(s) unapproved successfully.")
     unapprove_sellers.short_description = "Unapprove selected sellers"
 
     def activate_users(self, request, queryset):
         """Activate selected users"""
-        updated = queryset.update(is_active=True)
-        self.message_user(request, f"{updated} user(s) activated successfully.")
+        record = self._bulk(request, queryset, actions.set_users_active, True)
+        self.message_user(request, f"{record.affected} user(s) activated successfully.")
     activate_users.short_description = "Activate selected users"
 
     def deactivate_users(self, request, queryset):
         """Deactivate selected users"""
-        updated = queryset.update(is_active=False)
-        self.message_user(request, f"{updated} user(s) deactivated successfully.")
+        record = self._bulk(request, queryset, actions.set_users_active, False)
+        self.message_user(request, f"{record.affected} user(s) deactivated successfully.")
     deactivate_users.short_description = "Deactivate selected users"
 
 @admin.register(SellerProfile)
-class SellerProfileAdmin(admin.ModelAdmin):
+class SellerProfileAdmin(ScalableAdmin):
     list_display = ['business_name', 'user', 'rating', 'total_sales']
     search_fields = ['business_name', 'user__username']
+    list_select_related = ['user']
+    raw_id_fields = ['user']
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'product_count', 'created_at']
-    
+    search_fields = ['name']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(product_count=Count('product'))
+
     def product_count(self, obj):
-        return obj.product_set.count()
+        return obj.product_count
     product_count.short_description = 'Products'
+    product_count.admin_order_field = 'product_count'
 
 @admin.register(Product)
-class ProductAdmin(admin.ModelAdmin):
+class ProductAdmin(ScalableAdmin):
     list_display = ['name', 'seller', 'category', 'price', 'stock_quantity', 'is_active', 'created_at']
     list_filter = ['category', 'livestock_type', 'is_active', 'created_at']
     search_fields = ['name', 'description']
     list_editable = ['price', 'stock_quantity', 'is_active']
+    list_select_related = ['seller', 'category']
+    autocomplete_fields = ['seller', 'category']
 
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
+    fields = ['product', 'quantity', 'price', 'status']
+    readonly_fields = ['product', 'quantity', 'price']  # Fixed at checkout
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product', 'order')  # Both are used by __str__
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+def order_status_action(status, label):
+    """Admin action moving the selected orders to status where the order state machine allows it"""
+    def action(modeladmin, request, queryset):
+        record = actions.transition_orders(request.user, list(queryset.values_list('pk', flat=True)), status)
+        message = f"{record.affected} order(s) marked as {label.lower()}."
+        skipped = record.requested - record.affected
+        if skipped:
+            message += f" {skipped} skipped (not allowed from their current status)."
+        modeladmin.message_user(request, message)
+    action.__name__ = f'mark_{status}'
+    action.short_description = f"Mark selected orders as {label.lower()}"
+    return action
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
+class OrderAdmin(ScalableAdmin):
     list_display = ['order_number', 'customer', 'total_amount', 'status', 'created_at', 'view_order_link']
     list_filter = ['status', 'created_at']
     search_fields = ['order_number', 'customer__username']
-    list_editable = ['status']
+    list_select_related = ['customer']
+    raw_id_fields = ['customer']
     inlines = [OrderItemInline]
+    # Status changes go through the actions, which follow the order state
+    # machine, notify the customer and are logged as AdminActions
+    readonly_fields = ['status']
+    actions = [order_status_action(status, label) for status, label in Order.ORDER_STATUS]
     
     def view_order_link(self, obj):
         url = reverse('dashboard:order_management')
         return format_html('<a href="{}">View in Dashboard</a>', url)
     view_order_link.short_description = 'Dashboard Link'
 
+@admin.register(AdminAction)
+class AdminActionAdmin(ScalableAdmin):
+    list_display = ['action', 'target_type', 'affected', 'requested', 'actor', 'created_at']
+    list_filter = ['target_type', 'action', 'created_at']
+    list_select_related = ['actor']
+    readonly_fields = ['actor', 'action', 'target_type', 'target_ids', 'requested', 'affected', 'details', 'created_at']
+
 # Customize Admin Site
 admin.site.site_header = "LivestockHub Administration"
 admin.site.site_title = "LivestockHub Admin"
-admin.site.index_title = "Welcome to LivestockHub Administration"
\ No newline at end of file
+admin.site.index_title = "Welcome to LivestockHub Administration"
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from dashboard import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the admin search index for every user, product and order"
+
+    def handle(self, *args, **options):
+        count = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} search terms."))
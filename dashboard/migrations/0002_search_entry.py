@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dashboard', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=255)),
+                ('kind', models.CharField(choices=[('user', 'User'), ('product', 'Product'), ('order', 'Order')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('field', models.CharField(max_length=20)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('label', models.CharField(max_length=255)),
+            ],
+            options={
+                'verbose_name_plural': 'Search entries',
+                'indexes': [models.Index(fields=['term'], name='dashboard_s_term_a0c13e_idx'), models.Index(fields=['kind', 'object_id'], name='dashboard_s_kind_36a719_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,53 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class AdminAction(models.Model):
+    """Audit record of a bulk action taken from the admin dashboard"""
+    TARGET_TYPES = (
+        ('user', 'User'),
+        ('product', 'Product'),
+        ('order', 'Order'),
+    )
+
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='admin_actions')
+    action = models.CharField(max_length=50)
+    target_type = models.CharField(max_length=20, choices=TARGET_TYPES)
+    target_ids = models.JSONField(default=list)  # Rows actually changed
+    requested = models.PositiveIntegerField(default=0)
+    affected = models.PositiveIntegerField(default=0)
+    details = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['created_at'])]
+
+    def __str__(self):
+        return f"{self.action} on {self.affected} {self.target_type}(s)"
+
+
+class SearchEntry(models.Model):
+    """One lowercased search term pointing at a user, product or order, maintained by dashboard.search"""
+    KINDS = (
+        ('user', 'User'),
+        ('product', 'Product'),
+        ('order', 'Order'),
+    )
+
+    term = models.CharField(max_length=255)
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.BigIntegerField()
+    field = models.CharField(max_length=20)  # Which attribute the term came from
+    weight = models.PositiveSmallIntegerField(default=1)
+    label = models.CharField(max_length=255)  # Shown in results without loading the object
+
+    class Meta:
+        verbose_name_plural = "Search entries"
+        indexes = [
+            models.Index(fields=['term']),
+            models.Index(fields=['kind', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.kind} {self.object_id}"
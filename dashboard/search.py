@@ -0,0 +1,212 @@
+"""Global admin search over users, products and orders.
+
+Searchable attributes are copied into SearchEntry as lowercased terms: order
+numbers, phone numbers (digits only, with and without the country code),
+usernames, emails, names and product name words. A lookup is then a prefix
+range scan on the indexed term column - term >= q AND term < q + U+10FFFF,
+which every backend can answer from the b-tree, unlike LIKE/icontains - and
+the candidates are ranked in Python. Labels are stored with the terms, so
+results never load the underlying objects.
+
+Entries are kept current by the post_save/post_delete receivers in
+dashboard.signals; rebuild_search_index backfills or repairs the table.
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.urls import reverse
+
+from accounts.models import User
+from accounts.phones import COUNTRY_CODE
+from marketplace.models import Product
+from orders.models import Order
+from .models import SearchEntry
+
+MIN_QUERY_LENGTH = 2
+CANDIDATES = 200  # Per query token, read in index order
+MAX_TERM_LENGTH = 255
+
+# Field weights; exact matches get EXACT_BONUS on top
+WEIGHTS = {
+    'order_number': 10,
+    'phone': 8,
+    'username': 7,
+    'email': 6,
+    'name': 4,
+}
+EXACT_BONUS = 5
+
+ADMIN_URLS = {
+    'user': 'admin:accounts_user_change',
+    'product': 'admin:marketplace_product_change',
+    'order': 'admin:orders_order_change',
+}
+
+WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    return (text or '').strip().lower()[:MAX_TERM_LENGTH]
+
+
+def phone_terms(number):
+    """Digits of a phone number, plus its national form so either spelling matches"""
+    digits = re.sub(r'\D', '', number or '')
+    if not digits:
+        return set()
+    terms = {digits}
+    if digits.startswith(COUNTRY_CODE) and len(digits) > 9:
+        terms.add('0' + digits[len(COUNTRY_CODE):])
+    elif digits.startswith('0'):
+        terms.add(COUNTRY_CODE + digits[1:])
+    return terms
+
+
+def word_terms(text):
+    return {normalize(word) for word in WORD.findall(text or '') if len(word) >= MIN_QUERY_LENGTH}
+
+
+def terms_for(kind, obj):
+    """(field, term) pairs and the result label for an object"""
+    if kind == 'user':
+        terms = {('username', normalize(obj.username))}
+        if obj.email:
+            terms.add(('email', normalize(obj.email)))
+        terms |= {('phone', term) for term in phone_terms(obj.phone_number)}
+        terms |= {('name', term) for term in word_terms(f'{obj.first_name} {obj.last_name}')}
+        label = f"{obj.username} ({obj.get_user_type_display()})"
+    elif kind == 'product':
+        terms = {('name', term) for term in word_terms(obj.name)}
+        label = obj.name
+    else:
+        terms = {('order_number', normalize(obj.order_number))}
+        for number in (obj.shipping_phone, obj.customer_phone):
+            terms |= {('phone', term) for term in phone_terms(number)}
+        label = f"Order #{obj.order_number}"
+    return {(field, term) for field, term in terms if term}, label[:255]
+
+
+def kind_of(instance):
+    if isinstance(instance, User):
+        return 'user'
+    if isinstance(instance, Product):
+        return 'product'
+    if isinstance(instance, Order):
+        return 'order'
+    return None
+
+
+def _entries(kind, obj):
+    terms, label = terms_for(kind, obj)
+    return [
+        SearchEntry(term=term, kind=kind, object_id=obj.pk, field=field, weight=WEIGHTS[field], label=label)
+        for field, term in terms
+    ]
+
+
+def index(instance):
+    """Bring the entries of one object up to date, writing only if they changed"""
+    index_all(kind_of(instance), [instance])
+
+
+def index_all(kind, objects):
+    """Bring the entries of many objects of one kind up to date in one read and one write"""
+    wanted = {obj.pk: _entries(kind, obj) for obj in objects}
+    if not wanted:
+        return
+    existing = defaultdict(set)
+    for object_id, field, term, label in SearchEntry.objects.filter(kind=kind, object_id__in=wanted).values_list(
+        'object_id', 'field', 'term', 'label'
+    ):
+        existing[object_id].add((field, term, label))
+    changed = [
+        pk for pk, entries in wanted.items()
+        if existing[pk] != {(entry.field, entry.term, entry.label) for entry in entries}
+    ]
+    if not changed:
+        return
+
+    with transaction.atomic():
+        SearchEntry.objects.filter(kind=kind, object_id__in=changed).delete()
+        SearchEntry.objects.bulk_create([entry for pk in changed for entry in wanted[pk]], batch_size=500)
+
+
+def remove(instance, kind=None):
+    SearchEntry.objects.filter(kind=kind or kind_of(instance), object_id=instance.pk).delete()
+
+
+def rebuild(batch_size=2000):
+    """Recreate every entry; returns the number written"""
+    written = 0
+    with transaction.atomic():
+        SearchEntry.objects.all().delete()
+        for kind, queryset in (('user', User.objects.all()), ('product', Product.objects.all()), ('order', Order.objects.all())):
+            batch = []
+            for obj in queryset.order_by('pk').iterator(chunk_size=batch_size):
+                batch.extend(_entries(kind, obj))
+                if len(batch) >= batch_size:
+                    SearchEntry.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            SearchEntry.objects.bulk_create(batch)
+            written += len(batch)
+    return written
+
+
+def _prefix_matches(token):
+    return SearchEntry.objects.filter(
+        term__gte=token, term__lt=token + '\U0010ffff'
+    ).order_by('term').values_list('kind', 'object_id', 'field', 'term', 'weight', 'label')[:CANDIDATES]
+
+
+def lookup(query, limit=20):
+    """Ranked results for a free-text query, each {kind, id, label, matched, score, url}
+
+    Every word of the query has to prefix-match some term of the result.
+    """
+    compact = re.sub(r'[\s+()-]', '', query)
+    if compact.isdigit():
+        # A phone (or numeric order) number in any spelling: any form may match
+        tokens, match_all = phone_terms(compact) | {compact}, False
+    else:
+        tokens, match_all = {normalize(word) for word in query.split()}, True
+    tokens = {token for token in tokens if len(token) >= MIN_QUERY_LENGTH}
+    if not tokens:
+        return []
+
+    scores = None
+    matched = defaultdict(set)
+    labels = {}
+    for token in tokens:
+        best = {}
+        for kind, object_id, field, term, weight, label in _prefix_matches(token):
+            key = (kind, object_id)
+            score = weight + (EXACT_BONUS if term == token else 0)
+            if score > best.get(key, (0, None))[0]:
+                best[key] = (score, field)
+            labels[key] = label
+        for key, (_, field) in best.items():
+            matched[key].add(field)
+
+        token_scores = {key: score for key, (score, _) in best.items()}
+        if scores is None:
+            scores = token_scores
+        elif match_all:
+            scores = {key: scores[key] + token_scores[key] for key in scores.keys() & token_scores.keys()}
+        else:
+            for key, score in token_scores.items():
+                scores[key] = max(scores.get(key, 0), score)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [
+        {
+            'kind': kind,
+            'id': object_id,
+            'label': labels[(kind, object_id)],
+            'matched': sorted(matched[(kind, object_id)]),
+            'score': score,
+            'url': reverse(ADMIN_URLS[kind], args=[object_id]),
+        }
+        for (kind, object_id), score in ranked
+    ]
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from marketplace.models import Product
+from orders.models import Order
+from . import search
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid='search_user_saved')
+@receiver(post_save, sender=Product, dispatch_uid='search_product_saved')
+@receiver(post_save, sender=Order, dispatch_uid='search_order_saved')
+def searchable_saved(sender, instance, update_fields=None, **kwargs):
+    """Keep the admin search entries of users, products and orders current"""
+    if update_fields is not None and set(update_fields) <= {'last_login', 'status', 'stock_quantity', 'is_active', 'updated_at'}:
+        return  # None of these are searchable
+    search.index(instance)
+
+    if update_fields is not None and 'phone_number' in update_fields and search.kind_of(instance) == 'user':
+        # accounts.phones.set_customer_phone fills the phone into orders with update()
+        search.index_all('order', instance.orders.all())
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL, dispatch_uid='search_user_deleted')
+@receiver(post_delete, sender=Product, dispatch_uid='search_product_deleted')
+@receiver(post_delete, sender=Order, dispatch_uid='search_order_deleted')
+def searchable_deleted(sender, instance, **kwargs):
+    search.remove(instance)
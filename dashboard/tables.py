@@ -0,0 +1,115 @@
+"""Server-side paging, sorting, filtering and search for the admin management tables.
+
+Only the rows of the requested page are fetched. Counting is bounded: up to
+ADMIN_TABLE_EXACT_COUNT_LIMIT matches are counted exactly; past that an
+unfiltered table reports the database's row estimate and a filtered one
+reports "more than the limit", so paging a table with millions of rows never
+runs a full COUNT(*).
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def page_size():
+    return getattr(settings, 'ADMIN_TABLE_PAGE_SIZE', 50)
+
+
+def exact_count_limit():
+    return getattr(settings, 'ADMIN_TABLE_EXACT_COUNT_LIMIT', 10000)
+
+
+def estimated_rows(model):
+    """Cheap estimate of a table's row count, or None if the backend has none"""
+    table = connection.ops.quote_name(model._meta.db_table)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        elif connection.vendor == 'sqlite':
+            # Rowids grow with inserts, so the largest one is read straight off the b-tree
+            cursor.execute(f"SELECT MAX(rowid) FROM {table}")
+        else:
+            return None
+        row = cursor.fetchone()
+    return max(row[0] or 0, 0) if row else None
+
+
+class TablePaginator(Paginator):
+    """Paginator that counts exactly up to a limit and estimates beyond it
+
+    Also usable as ModelAdmin.paginator.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.is_estimate = False
+
+    @property
+    def filtered(self):
+        """Whether the queryset covers less than the whole table"""
+        return bool(self.object_list.query.where)
+
+    @cached_property
+    def count(self):
+        limit = exact_count_limit()
+        count = self.object_list.order_by()[:limit + 1].count()
+        if count <= limit:
+            return count
+
+        self.is_estimate = True
+        if not self.filtered:
+            estimate = estimated_rows(self.object_list.model)
+            if estimate:
+                return max(estimate, count)
+        return count
+
+
+def build_table(request, queryset, search_fields=(), filters=None, sort_fields=(), default_sort='-pk'):
+    """Apply the request's search, filters and sort to queryset and return one page
+
+    filters maps a GET parameter to {accepted value: Q}; unknown values are
+    ignored, as are sort keys not listed in sort_fields. Returns template
+    context: page_obj, paginator, search_query, filter values, sort_by and
+    the query strings for page and sort links.
+    """
+    filters = filters or {}
+
+    search_query = request.GET.get('search', '').strip()
+    if search_query and search_fields:
+        condition = Q()
+        for field in search_fields:
+            condition |= Q(**{f'{field}__icontains': search_query})
+        queryset = queryset.filter(condition)
+
+    active_filters = {}
+    for param, choices in filters.items():
+        value = request.GET.get(param, '')
+        if value in choices:
+            queryset = queryset.filter(choices[value])
+            active_filters[param] = value
+
+    sort_by = request.GET.get('sort', default_sort)
+    if sort_by.lstrip('-') not in sort_fields:
+        sort_by = default_sort
+    queryset = queryset.order_by(sort_by, '-pk')  # pk keeps pages stable when sort values tie
+
+    paginator = TablePaginator(queryset, page_size())
+    page_obj = paginator.get_page(request.GET.get('page'))
+
+    params = request.GET.copy()
+    params.pop('page', None)
+    page_query = params.urlencode()
+    params.pop('sort', None)
+    sort_query = params.urlencode()
+
+    return {
+        'page_obj': page_obj,
+        'paginator': paginator,
+        'search_query': search_query,
+        'filters': active_filters,
+        'sort_by': sort_by,
+        'page_query': page_query,
+        'sort_query': sort_query,
+    }
@@ -1,3 +1,116 @@
-from django.test import TestCase
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import User, SellerProfile
+from marketplace.models import Category, Product
+from orders.models import Order, OrderItem
+from . import actions
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AdminQueryCountTests(TestCase):
+    """Admin pages must run the same number of queries however many rows they show"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw', user_type='admin')
+        cls.category = Category.objects.create(name='Cattle')
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', user_type='seller')
+        cls.customer = User.objects.create_user('customer', 'customer@example.com', 'pw')
+        cls.product = cls.make_product(cls.seller, cls.category)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    @classmethod
+    def make_product(cls, seller, category):
+        return Product.objects.create(
+            seller=seller, category=category, name='Cow', description='Dairy cow',
+            price=Decimal('100.00'), stock_quantity=5, livestock_type='cattle', image='products/cow.jpg',
+        )
+
+    def make_order(self, items=1):
+        order = Order.objects.create(
+            customer=self.customer, total_amount=Decimal('100.00'),
+            shipping_address='KG 1 Ave', shipping_city='Kigali', shipping_phone='0788000000',
+        )
+        for _ in range(items):
+            OrderItem.objects.create(order=order, product=self.product, quantity=1, price=Decimal('100.00'))
+        return order
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return queries
+
+    def assertConstantQueries(self, url, add_rows):
+        self.count_queries(url)  # Warm per-process caches (content types, permissions)
+        before = self.count_queries(url)
+        add_rows()
+        after = self.count_queries(url)
+        self.assertEqual(
+            len(after), len(before),
+            "Query count grew with the number of rows:\n" + "\n".join(q['sql'] for q in after.captured_queries)
+        )
+
+    def test_user_changelist(self):
+        def add_rows():
+            for i in range(10):
+                User.objects.create_user(f'user{i}', f'user{i}@example.com', 'pw')
+        self.assertConstantQueries(reverse('admin:accounts_user_changelist'), add_rows)
+
+    def test_seller_profile_changelist(self):
+        def add_rows():
+            for i in range(10):
+                user = User.objects.create_user(f'farm{i}', f'farm{i}@example.com', 'pw', user_type='seller')
+                SellerProfile.objects.create(user=user, business_name=f'Farm {i}')
+        self.assertConstantQueries(reverse('admin:accounts_sellerprofile_changelist'), add_rows)
+
+    def test_category_changelist(self):
+        def add_rows():
+            for i in range(10):
+                category = Category.objects.create(name=f'Category {i}')
+                self.make_product(self.seller, category)
+        self.assertConstantQueries(reverse('admin:marketplace_category_changelist'), add_rows)
+
+    def test_product_changelist(self):
+        def add_rows():
+            for i in range(10):
+                seller = User.objects.create_user(f'farm{i}', f'farm{i}@example.com', 'pw', user_type='seller')
+                self.make_product(seller, Category.objects.create(name=f'Category {i}'))
+        self.assertConstantQueries(reverse('admin:marketplace_product_changelist'), add_rows)
+
+    def test_order_changelist(self):
+        def add_rows():
+            for _ in range(10):
+                self.make_order()
+        self.make_order()
+        self.assertConstantQueries(reverse('admin:orders_order_changelist'), add_rows)
+
+    def test_order_change_view_inline(self):
+        order = self.make_order(items=1)
+
+        def add_rows():
+            for _ in range(10):
+                OrderItem.objects.create(order=order, product=self.product, quantity=1, price=Decimal('100.00'))
+        self.assertConstantQueries(reverse('admin:orders_order_change', args=[order.pk]), add_rows)
+
+    def test_admin_action_changelist(self):
+        def add_rows():
+            for _ in range(10):
+                actions.set_users_active(self.admin, [self.customer.pk], False)
+                actions.set_users_active(self.admin, [self.customer.pk], True)
+        self.assertConstantQueries(reverse('admin:dashboard_adminaction_changelist'), add_rows)
+
+    def test_changelist_skips_full_count(self):
+        queries = self.count_queries(reverse('admin:marketplace_product_changelist') + '?is_active__exact=1')
+        unfiltered_counts = [
+            q['sql'] for q in queries.captured_queries
+            if 'COUNT(' in q['sql'] and 'WHERE' not in q['sql'] and 'marketplace_product' in q['sql']
+        ]
+        self.assertEqual(unfiltered_counts, [])
@@ -5,6 +5,8 @@ app_name = 'dashboard'
 
 urlpatterns = [
     path('', views.admin_dashboard, name='admin_dashboard'),
+    path('kpis/', views.kpi_snapshot, name='kpi_snapshot'),
+    path('search/', views.global_search, name='global_search'),
     path('admin-redirect/', views.admin_redirect, name='admin_redirect'),
     path('users/', views.user_management, name='user_management'),
     path('sellers/', views.seller_management, name='seller_management'),
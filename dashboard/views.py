@@ -2,9 +2,15 @@ from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
+from django.db.models import Count, Q
+from django.http import JsonResponse
 from accounts.models import User
+from livestockhub import replicas
+from marketplace import kpis
 from marketplace.models import Product, Category
 from orders.models import Order
+from . import actions, search
+from .tables import build_table
 import json
 
 
@@ -18,8 +24,41 @@ def admin_required(function):
         return function(request, *args, **kwargs)
     return wrapper
 
+USER_FILTERS = {
+    'type': {code: Q(user_type=code) for code, _ in User.USER_TYPE_CHOICES},
+    'status': {'active': Q(is_active=True), 'inactive': Q(is_active=False)},
+}
+
+SELLER_FILTERS = {
+    'approval': {'approved': Q(is_seller_approved=True), 'pending': Q(is_seller_approved=False)},
+}
+
+PRODUCT_FILTERS = {
+    'status': {'active': Q(is_active=True), 'inactive': Q(is_active=False)},
+    'livestock': {code: Q(livestock_type=code) for code, _ in Product.LIVESTOCK_TYPES},
+    'stock': {'out': Q(stock_quantity=0)},
+}
+
+ORDER_FILTERS = {
+    'status': {code: Q(status=code) for code, _ in Order.ORDER_STATUS},
+}
+
+
+def posted_ids(request, row_field):
+    """Ids selected with the bulk checkboxes, or the single row the action came from"""
+    return actions.parse_ids(request.POST.getlist('ids') or [request.POST.get(row_field)])
+
+
+def report_action(request, record, done, noun):
+    skipped = record.requested - record.affected
+    message = f"{record.affected} {noun}(s) {done}"
+    if skipped:
+        message += f"; {skipped} skipped (already {done} or not eligible)"
+    messages.success(request, message + ".")
+
 @login_required
 @admin_required
+@replicas.read_only
 def admin_dashboard(request):
     """Redirect to Django admin or show custom dashboard"""
     # You can choose to redirect to Django admin or show custom dashboard
@@ -27,26 +66,37 @@ def admin_dashboard(request):
     # return redirect('/admin/')
     
     # Option 2: Show custom dashboard (current implementation)
-    total_users = User.objects.count()
-    total_sellers = User.objects.filter(user_type='seller').count()
-    total_products = Product.objects.count()
-    total_orders = Order.objects.count()
-    pending_sellers = User.objects.filter(user_type='seller', is_seller_approved=False)
+    snapshot = kpis.snapshot()
+    pending_sellers = User.objects.filter(user_type='seller', is_seller_approved=False).order_by('-date_joined')
     
-    recent_orders = Order.objects.all().order_by('-created_at')[:5]
+    recent_orders = Order.objects.select_related('customer').order_by('-created_at')[:5]
     recent_users = User.objects.all().order_by('-date_joined')[:5]
     
     context = {
-        'total_users': total_users,
-        'total_sellers': total_sellers,
-        'total_products': total_products,
-        'total_orders': total_orders,
+        'total_users': snapshot['total_users'],
+        'total_sellers': snapshot['total_sellers'],
+        'total_products': snapshot['total_products'],
+        'total_orders': snapshot['total_orders'],
         'pending_sellers': pending_sellers,
         'recent_orders': recent_orders,
         'recent_users': recent_users,
-        'pending_sellers_count': pending_sellers.count(),
+        'pending_sellers_count': snapshot['pending_sellers'],
     }
-    return render(request, 'dashboard/admin_dashboard.html', context)
+    return render(request, 'admin/admin_dashboard.html', context)
+
+@login_required
+@admin_required
+@replicas.read_only
+def kpi_snapshot(request):
+    """Platform KPI counters as JSON"""
+    return JsonResponse(kpis.snapshot())
+
+@login_required
+@admin_required
+def global_search(request):
+    """Ranked users, products and orders matching ?q= as JSON"""
+    query = request.GET.get('q', '').strip()
+    return JsonResponse({'query': query, 'results': search.lookup(query)})
 
 @login_required
 @admin_required
@@ -59,111 +109,127 @@ def admin_redirect(request):
 @admin_required
 def user_management(request):
     """User management view"""
-    users = User.objects.all().order_by('-date_joined')
     
     if request.method == 'POST':
-        user_id = request.POST.get('user_id')
+        ids = posted_ids(request, 'user_id')
+        if not ids:
+            messages.error(request, "Select at least one row.")
+            return redirect(request.get_full_path())
         action = request.POST.get('action')
-        user = User.objects.get(id=user_id)
         
-        if action == 'toggle_active':
-            user.is_active = not user.is_active
-            user.save()
-            messages.success(request, f"User {user.username} {'activated' if user.is_active else 'deactivated'}")
-        elif action == 'approve_seller' and user.user_type == 'seller':
-            user.is_seller_approved = True
-            user.save()
-
-            # Send notification to the seller
-            from orders.models import Notification
-            try:
-                Notification.objects.create(
-                    user=user,
-                    notification_type='order_confirmed',  # Using existing type, could add new one
-                    title='Seller Account Approved',
-                    message='Congratulations! Your seller account has been approved. You can now access all seller features.',
-                    related_order=None
-                )
-            except:
-                # If Notification model doesn't exist, skip notification
-                pass
-
-            messages.success(request, f"Seller {user.username} approved")
+        if action in ('activate', 'deactivate'):
+            record = actions.set_users_active(request.user, ids, action == 'activate')
+            report_action(request, record, f'{action}d', 'user')
+        elif action == 'approve_seller':
+            record = actions.set_sellers_approved(request.user, ids, True)
+            report_action(request, record, 'approved', 'seller')
+        else:
+            messages.error(request, "Invalid action.")
         
-        return redirect('dashboard:user_management')
+        return redirect(request.get_full_path())
     
-    context = {
-        'users': users,
-    }
-    return render(request, 'dashboard/user_management.html', context)
+    context = build_table(
+        request, User.objects.all(),
+        search_fields=['username', 'email', 'first_name', 'last_name'],
+        filters=USER_FILTERS,
+        sort_fields=['username', 'email', 'user_type', 'date_joined'],
+        default_sort='-date_joined',
+    )
+    context['users'] = context['page_obj']
+    return render(request, 'admin/user_management.html', context)
 
 @login_required
 @admin_required
 def seller_management(request):
     """Seller management view"""
-    sellers = User.objects.filter(user_type='seller')
     
     if request.method == 'POST':
-        seller_id = request.POST.get('seller_id')
+        ids = posted_ids(request, 'seller_id')
+        if not ids:
+            messages.error(request, "Select at least one row.")
+            return redirect(request.get_full_path())
         action = request.POST.get('action')
-        seller = User.objects.get(id=seller_id)
         
-        if action == 'toggle_approval':
-            seller.is_seller_approved = not seller.is_seller_approved
-            seller.save()
-            status = "approved" if seller.is_seller_approved else "unapproved"
-            messages.success(request, f"Seller {seller.username} {status}")
+        if action in ('approve', 'unapprove'):
+            record = actions.set_sellers_approved(request.user, ids, action == 'approve')
+            report_action(request, record, f'{action}d', 'seller')
+        else:
+            messages.error(request, "Invalid action.")
         
-        return redirect('dashboard:seller_management')
+        return redirect(request.get_full_path())
     
-    context = {
-        'sellers': sellers,
-    }
-    return render(request, 'dashboard/seller_management.html', context)
+    sellers = User.objects.filter(user_type='seller').select_related('seller_profile').annotate(
+        product_count=Count('product')
+    )
+    context = build_table(
+        request, sellers,
+        search_fields=['username', 'email', 'seller_profile__business_name'],
+        filters=SELLER_FILTERS,
+        sort_fields=['username', 'email', 'seller_profile__business_name', 'date_joined'],
+        default_sort='-date_joined',
+    )
+    context['sellers'] = context['page_obj']
+    return render(request, 'admin/seller_management.html', context)
 
 @login_required
 @admin_required
 def product_management(request):
     """Product management view"""
-    products = Product.objects.all().order_by('-created_at')
     
     if request.method == 'POST':
-        product_id = request.POST.get('product_id')
+        ids = posted_ids(request, 'product_id')
+        if not ids:
+            messages.error(request, "Select at least one row.")
+            return redirect(request.get_full_path())
         action = request.POST.get('action')
-        product = Product.objects.get(id=product_id)
         
-        if action == 'toggle_active':
-            product.is_active = not product.is_active
-            product.save()
-            status = "activated" if product.is_active else "deactivated"
-            messages.success(request, f"Product {product.name} {status}")
+        if action in ('activate', 'deactivate'):
+            record = actions.set_products_active(request.user, ids, action == 'activate')
+            report_action(request, record, f'{action}d', 'product')
+        else:
+            messages.error(request, "Invalid action.")
         
-        return redirect('dashboard:product_management')
+        return redirect(request.get_full_path())
     
-    context = {
-        'products': products,
-    }
-    return render(request, 'dashboard/product_management.html', context)
+    context = build_table(
+        request, Product.objects.select_related('seller', 'category'),
+        search_fields=['name', 'seller__username', 'category__name'],
+        filters=PRODUCT_FILTERS,
+        sort_fields=['name', 'price', 'stock_quantity', 'created_at'],
+        default_sort='-created_at',
+    )
+    context['products'] = context['page_obj']
+    context['livestock_types'] = Product.LIVESTOCK_TYPES
+    return render(request, 'admin/product_management.html', context)
 
 @login_required
 @admin_required
 def order_management(request):
     """Order management view"""
-    orders = Order.objects.all().order_by('-created_at')
     
     if request.method == 'POST':
-        order_id = request.POST.get('order_id')
+        ids = posted_ids(request, 'order_id')
+        if not ids:
+            messages.error(request, "Select at least one row.")
+            return redirect(request.get_full_path())
         new_status = request.POST.get('status')
-        order = Order.objects.get(id=order_id)
         
-        order.status = new_status
-        order.save()
-        messages.success(request, f"Order {order.order_number} status updated to {new_status}")
+        if new_status in dict(Order.ORDER_STATUS):
+            record = actions.transition_orders(request.user, ids, new_status)
+            report_action(request, record, f'moved to {new_status}', 'order')
+        else:
+            messages.error(request, "Invalid status.")
         
-        return redirect('dashboard:order_management')
+        return redirect(request.get_full_path())
     
-    context = {
-        'orders': orders,
-    }
-    return render(request, 'dashboard/order_management.html', context)
+    context = build_table(
+        request, Order.objects.select_related('customer'),
+        search_fields=['order_number', 'customer__username', 'shipping_phone'],
+        filters=ORDER_FILTERS,
+        sort_fields=['order_number', 'total_amount', 'status', 'created_at'],
+        default_sort='-created_at',
+    )
+    context['orders'] = context['page_obj']
+    context['order_statuses'] = Order.ORDER_STATUS
+    return render(request, 'admin/order_management.html', context)
 
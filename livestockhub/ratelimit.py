@@ -0,0 +1,139 @@
+"""Token-bucket rate limiting and load shedding for hot public endpoints.
+
+RATE_LIMITS maps URL names to rules:
+
+    'marketplace:search_categories': {'rate': 2, 'burst': 20, 'priority': 'low'}
+
+rate is tokens refilled per second and burst the bucket size; an optional
+'methods' list limits only those methods (e.g. POST for login). Every
+matching request takes a token from its client IP's bucket and, if it has a
+session cookie, from that session's bucket too (keyed off the cookie, so the
+session is never loaded); an empty bucket gets a 429
+with Retry-After. Buckets are kept in the RATE_LIMIT_CACHE cache - local
+memory, i.e. per process, by default; point it at a shared cache to limit
+across worker processes.
+
+When the server is backed up - more than RATE_LIMIT_SHED_IN_FLIGHT requests
+running in this process, or a request that waited more than
+RATE_LIMIT_SHED_QUEUE_MS in the front-end queue (from the proxy's
+X-Request-Start header) - low-priority routes are refused outright. All of
+this happens before the view, so a limited request never reaches the ORM.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+
+
+def rules():
+    return getattr(settings, 'RATE_LIMITS', {})
+
+
+def cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+def shed_in_flight():
+    return getattr(settings, 'RATE_LIMIT_SHED_IN_FLIGHT', 16)
+
+
+def shed_queue_ms():
+    return getattr(settings, 'RATE_LIMIT_SHED_QUEUE_MS', 500)
+
+
+def take(key, rate, burst):
+    """Take a token from a bucket; returns 0 if one was taken, else seconds until one is available
+
+    The read-modify-write is not atomic, so concurrent requests can
+    occasionally share a token; close enough for shedding abuse.
+    """
+    now = time.time()
+    tokens, stamp = cache().get(key, (burst, now))
+    tokens = min(burst, tokens + max(now - stamp, 0) * rate)
+    timeout = math.ceil(burst / rate) + 1  # A bucket left alone this long is full again
+    if tokens < 1:
+        cache().set(key, (tokens, now), timeout)
+        return (1 - tokens) / rate
+    cache().set(key, (tokens - 1, now), timeout)
+    return 0
+
+
+def queue_ms(request):
+    """Milliseconds the request waited in front of Django, if the proxy says"""
+    header = request.META.get('HTTP_X_REQUEST_START', '')
+    try:
+        started = float(header.removeprefix('t='))
+    except ValueError:
+        return None
+    # Proxies send seconds (nginx $msec), milliseconds or microseconds since the epoch
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(time.time() - started, 0) * 1000
+
+
+def client_ip(request):
+    header = getattr(settings, 'RATE_LIMIT_CLIENT_IP_HEADER', None)  # e.g. 'HTTP_X_FORWARDED_FOR' behind a proxy
+    if header and request.META.get(header):
+        return request.META[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse("Too many requests, please slow down.", status=429, content_type='text/plain')
+    response['Retry-After'] = str(max(math.ceil(retry_after), 1))
+    return response
+
+
+class RateLimitMiddleware:
+    """Place before SessionMiddleware so a refused request never touches the session store"""
+
+    in_flight = 0
+    lock = threading.Lock()
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with self.lock:
+            RateLimitMiddleware.in_flight += 1
+        try:
+            return self.limit(request) or self.get_response(request)
+        finally:
+            with self.lock:
+                RateLimitMiddleware.in_flight -= 1
+
+    def limit(self, request):
+        """A 429 response if the request has to be refused, else None"""
+        limits = rules()
+        if not limits:
+            return None
+        try:
+            name = resolve(request.path_info).view_name
+        except Resolver404:
+            return None
+        rule = limits.get(name)
+        if rule is None or request.method not in rule.get('methods', [request.method]):
+            return None
+
+        if rule.get('priority') == 'low':
+            waited = queue_ms(request)
+            if self.in_flight > shed_in_flight() or (waited is not None and waited > shed_queue_ms()):
+                return too_many_requests(1)
+
+        buckets = [f'ratelimit:{name}:ip:{client_ip(request)}']
+        session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        if session_key:
+            digest = hashlib.sha256(session_key.encode()).hexdigest()[:32]  # Keep session keys out of the cache
+            buckets.append(f'ratelimit:{name}:session:{digest}')
+        for key in buckets:
+            wait = take(key, rule['rate'], rule['burst'])
+            if wait:
+                return too_many_requests(wait)
+        return None
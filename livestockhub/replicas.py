@@ -0,0 +1,143 @@
+"""Send reporting and catalogue reads to a read replica.
+
+When DATABASES has a 'replica' alias (DATABASE_REPLICA_URL, see
+livestockhub.database), queries made inside replica.reads() - or views
+decorated with @replica.read_only - read from it; everything else, every
+write and anything inside a transaction on the primary stays on 'default'.
+
+Read-your-writes: the first write in a request pins the rest of that
+request to the primary, and ReplicaMiddleware sets a short-lived cookie so
+the same client keeps reading from the primary for REPLICA_PIN_SECONDS
+after their latest write, long enough for the replica to catch up with
+what they just changed.
+
+If the replica cannot be reached, reads fall back to the primary and the
+replica is not retried for REPLICA_RETRY_SECONDS.
+
+To try it locally, copy the SQLite database with the backup API and point
+the alias at the copy:
+
+    python manage.py copy_replica /tmp/replica.sqlite3
+    DATABASE_REPLICA_URL=sqlite:////tmp/replica.sqlite3 python manage.py runserver
+"""
+import contextvars
+import functools
+import logging
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+REPLICA = 'replica'
+PIN_COOKIE = 'primary_reads'
+
+# Whether replica reads are allowed here; within a request, whether the
+# client arrived pinned to the primary and whether the request wrote (None
+# outside requests, e.g. in background jobs, which do not pin themselves)
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+_pinned = contextvars.ContextVar('replica_pinned', default=False)
+_wrote = contextvars.ContextVar('replica_wrote', default=None)
+_down_until = 0.0
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+
+def retry_seconds():
+    return getattr(settings, 'REPLICA_RETRY_SECONDS', 30)
+
+
+def configured():
+    return REPLICA in settings.DATABASES
+
+
+def available():
+    """Whether the replica answers; a failure skips it for REPLICA_RETRY_SECONDS"""
+    global _down_until
+    if time.monotonic() < _down_until:
+        return False
+    try:
+        connections[REPLICA].ensure_connection()
+    except DatabaseError:
+        logger.warning("Replica database unavailable; reading from the primary", exc_info=True)
+        _down_until = time.monotonic() + retry_seconds()
+        return False
+    return True
+
+
+@contextmanager
+def reads(allowed=True):
+    """Let the queries in this block read from the replica (or, with allowed=False, not)"""
+    token = _replica_reads.set(allowed)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def primary():
+    """Read from the primary in this block, e.g. for results that are stored and must not be stale"""
+    return reads(allowed=False)
+
+
+def read_only(view):
+    """View decorator: the view's reads may come from the replica"""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reads():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not configured():
+            return None
+        if (
+            _replica_reads.get() and not _pinned.get() and not _wrote.get()
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+            and available()
+        ):
+            return REPLICA
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        if not configured():
+            return None
+        if _wrote.get() is False:
+            _wrote.set(True)  # Read this write back from the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if {obj1._state.db, obj2._state.db} <= {DEFAULT_DB_ALIAS, REPLICA}:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db == REPLICA:
+            return False  # A copy of the primary, never migrated on its own
+        return None
+
+
+class ReplicaMiddleware:
+    """Pins clients that just wrote to the primary; place before any middleware that queries"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = _pinned.set(PIN_COOKIE in request.COOKIES)
+        wrote = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if _wrote.get() and configured():
+                # (Re)start the pin from this write, even for a client already pinned
+                response.set_cookie(PIN_COOKIE, '1', max_age=pin_seconds(), httponly=True, samesite='Lax')
+            return response
+        finally:
+            _wrote.reset(wrote)
+            _pinned.reset(pinned)
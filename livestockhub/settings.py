@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+from livestockhub import database
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = 'django-insecure-your-secret-key-here'
@@ -31,6 +33,9 @@ CRISPY_TEMPLATE_PACK = 'bootstrap4'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'livestockhub.staticfiles.StaticFilesMiddleware',
+    'livestockhub.replicas.ReplicaMiddleware',
+    'livestockhub.ratelimit.RateLimitMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,13 +69,19 @@ TEMPLATES = [
 WSGI_APPLICATION = 'livestockhub.wsgi.application'
 
 # Database configuration for SQLite (easily switchable)
+# Tuned SQLite unless DATABASE_URL says otherwise, see livestockhub.database
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database.config(BASE_DIR / 'db.sqlite3'),
 }
 
+# Optional read replica for reporting and catalogue reads, see livestockhub.replicas
+REPLICA_DATABASE = database.replica_config()
+if REPLICA_DATABASE:
+    DATABASES['replica'] = REPLICA_DATABASE
+DATABASE_ROUTERS = ['livestockhub.replicas.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10  # Clients read from the primary this long after they write
+REPLICA_RETRY_SECONDS = 30
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -90,11 +101,70 @@ STATICFILES_DIRS = [
     BASE_DIR / 'marketplace' / 'static',  # Add this
 ]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATIC_MAX_AGE = 60  # Seconds, for unhashed names; hashed ones are cached for a year
+
+# Hashed names plus gzip/brotli variants built by collectstatic (livestockhub.staticfiles)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'livestockhub.staticfiles.CompressedManifestStaticFilesStorage'},
+}
 
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Resized image derivatives (marketplace.images)
+THUMBNAIL_WIDTHS = [320, 640, 960]
+THUMBNAIL_QUALITY = 80
+IMAGE_WORKERS = 2  # Background derivative generation; 0 runs it inline
+
+# Resumable chunked uploads (marketplace.uploads); partial files are kept outside MEDIA_ROOT
+CHUNKED_UPLOAD_DIR = BASE_DIR / 'upload_chunks'
+CHUNKED_UPLOAD_CHUNK_SIZE = 1024 * 1024
+CHUNKED_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+
+# Caches; sessions get their own so report and KPI churn never evicts them
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'sessions',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'ratelimit': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ratelimit',
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    },
+}
+
+# Sessions. Without a shared cache they live in the database ('db'), which
+# every worker process sees. SESSION_CACHE_URL (a Redis URL, e.g.
+# redis://cache.internal:6379/1; needs the redis package) points the
+# 'sessions' cache at a shared server and makes cached_db the default: it
+# reads sessions from the cache and only touches the database when a session
+# changes or is not cached yet. signed_cookies keeps the (small) session in
+# the client cookie. SESSION_BACKEND=cached_db without SESSION_CACHE_URL
+# caches in local memory, which is per process: only for a single worker,
+# as a logout in one process is not seen by the others.
+SESSION_CACHE_URL = os.environ.get('SESSION_CACHE_URL', '')
+if SESSION_CACHE_URL:
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': SESSION_CACHE_URL,
+    }
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('SESSION_BACKEND', 'cached_db' if SESSION_CACHE_URL else 'db')]
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_SAVE_EVERY_REQUEST = False  # Save only sessions that changed
+SESSION_COOKIE_HTTPONLY = True
+
 # Custom user model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -106,4 +176,37 @@ LOGOUT_REDIRECT_URL = 'marketplace:home'
 # Email backend for notifications (development)
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Persisted report cache (marketplace.reports)
+REPORT_CACHE_MAX_ENTRIES = 1000
+REPORT_CACHE_MAX_AGE_DAYS = 90
+
+# Background report jobs (marketplace.jobs); 0 workers runs jobs inline
+REPORT_JOB_WORKERS = 2
+REPORT_JOB_TIMEOUT_SECONDS = 600
+
+# Inventory forecasting (marketplace.forecasting)
+FORECAST_SMOOTHING_ALPHA = 0.3
+FORECAST_HISTORY_DAYS = 90
+FORECAST_LEAD_TIME_DAYS = 7
+FORECAST_SAFETY_STOCK_DAYS = 3
+
+# Cached admin KPI snapshot (marketplace.kpis)
+KPI_SNAPSHOT_TTL_SECONDS = 60
+
+# Admin management tables (dashboard.tables)
+ADMIN_TABLE_PAGE_SIZE = 50
+ADMIN_TABLE_EXACT_COUNT_LIMIT = 10000
+
+# Rate limiting and load shedding (livestockhub.ratelimit); rate is tokens per second
+RATE_LIMIT_CACHE = 'ratelimit'
+RATE_LIMIT_SHED_IN_FLIGHT = 16
+RATE_LIMIT_SHED_QUEUE_MS = 500
+RATE_LIMITS = {
+    'marketplace:search_categories': {'rate': 2, 'burst': 20, 'priority': 'low'},
+    'marketplace:get_subcategories': {'rate': 2, 'burst': 20, 'priority': 'low'},
+    'marketplace:get_category_types': {'rate': 2, 'burst': 20, 'priority': 'low'},
+    'marketplace:product_list': {'rate': 1, 'burst': 30, 'priority': 'low'},
+    'accounts:login': {'rate': 0.1, 'burst': 10, 'methods': ['POST']},
+}
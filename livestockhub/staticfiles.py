@@ -0,0 +1,171 @@
+"""Fingerprinted, precompressed static files served with far-future caching.
+
+collectstatic (through CompressedManifestStaticFilesStorage) writes every
+file under a content-hashed name, css/main.3f2a9c1e.css, and next to each
+compressible one a gzip (.gz) and, if the brotli package is installed, a
+brotli (.br) variant, so nothing is ever compressed per request.
+
+StaticFilesMiddleware then serves STATIC_ROOT in production. It indexes
+the collected files once per process and picks the best variant the
+client accepts, with Vary: Accept-Encoding. Hashed names can never change
+content, so they are sent with Cache-Control: immutable and a one year
+max-age; unhashed names get STATIC_MAX_AGE. In DEBUG the middleware steps
+aside and runserver serves the source files as before.
+"""
+import gzip
+import mimetypes
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.files.base import ContentFile
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
+
+try:
+    import brotli
+except ImportError:  # Optional; without it only gzip variants are built
+    brotli = None
+
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.map', '.json', '.svg', '.txt', '.xml', '.html', '.ico', '.eot', '.ttf', '.otf'}
+MIN_SIZE = 256  # Smaller files gain nothing from compression
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))  # Preferred first
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def compress(data):
+    """{suffix: compressed bytes} for the variants worth keeping"""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['.br'] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in variants.items() if len(body) < len(data) * 0.95}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes .gz/.br variants at collectstatic time"""
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(paths) | set(self.hashed_files.values())):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE or not self.exists(name):
+                continue
+            with self.open(name) as file:
+                data = file.read()
+            if len(data) < MIN_SIZE:
+                continue
+            for suffix, body in compress(data).items():
+                if self.exists(name + suffix):
+                    self.delete(name + suffix)
+                self._save(name + suffix, ContentFile(body))
+                yield name, name + suffix, True
+
+    def stored_name(self, name):
+        # Files missing from the manifest (nothing collected yet, as in tests,
+        # or a template naming a file that does not exist) keep their plain name
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+
+class Asset:
+    """A collected file with its precompressed variants, stat'ed once"""
+
+    def __init__(self, path, immutable):
+        stat = path.stat()
+        self.path = path
+        self.size = stat.st_size
+        self.last_modified = http_date(stat.st_mtime)
+        self.etag = f'W/"{int(stat.st_mtime):x}-{stat.st_size:x}"'  # Weak: shared by every encoding
+        self.content_type = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+        self.cache_control = IMMUTABLE if immutable else f'public, max-age={max_age()}'
+        self.variants = {
+            coding: (path.with_name(path.name + suffix), path.with_name(path.name + suffix).stat().st_size)
+            for coding, suffix in ENCODINGS if path.with_name(path.name + suffix).exists()
+        }
+
+
+def max_age():
+    return getattr(settings, 'STATIC_MAX_AGE', 60)
+
+
+def accepted_encodings(request):
+    """Content codings the client accepts, ignoring q-values other than q=0"""
+    accepted = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding and params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """Serve STATIC_ROOT; place directly after SecurityMiddleware so static requests skip sessions and auth"""
+
+    def __init__(self, get_response):
+        if settings.DEBUG or not settings.STATIC_URL.startswith('/'):
+            raise MiddlewareNotUsed  # runserver serves static files, or they live on a CDN
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.assets = None
+        self.lock = threading.Lock()
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD') and request.path_info.startswith(self.prefix):
+            asset = self.index().get(request.path_info[len(self.prefix):])
+            if asset is not None:
+                return self.serve(request, asset)
+        return self.get_response(request)
+
+    def index(self):
+        """{relative name: Asset} of everything collected, built on the first request"""
+        with self.lock:
+            if self.assets is None:
+                self.assets = self.build_index(Path(settings.STATIC_ROOT))
+        return self.assets
+
+    def build_index(self, root):
+        hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        manifest = getattr(staticfiles_storage, 'manifest_name', None)
+        variant_suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        assets = {}
+        if not root.is_dir():
+            return assets
+        for path in root.rglob('*'):
+            name = path.relative_to(root).as_posix()
+            if not path.is_file() or name == manifest:
+                continue
+            if name.endswith(variant_suffixes) and path.with_suffix('').is_file():
+                continue  # Served through the file it compresses
+            assets[name] = Asset(path, immutable=name in hashed)
+        return assets
+
+    def serve(self, request, asset):
+        path, size, coding = asset.path, asset.size, None
+        accepted = accepted_encodings(request)
+        for candidate, _ in ENCODINGS:
+            if candidate in asset.variants and candidate in accepted:
+                (path, size), coding = asset.variants[candidate], candidate
+                break
+
+        if request.headers.get('If-None-Match') == asset.etag:
+            response = HttpResponseNotModified()
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=asset.content_type)
+        else:
+            response = FileResponse(path.open('rb'), content_type=asset.content_type, filename=asset.path.name)
+        if not isinstance(response, HttpResponseNotModified):
+            response['Content-Length'] = str(size)
+            response['Last-Modified'] = asset.last_modified
+            if coding:
+                response['Content-Encoding'] = coding
+        response['ETag'] = asset.etag
+        response['Cache-Control'] = asset.cache_control
+        if asset.variants:
+            response['Vary'] = 'Accept-Encoding'
+        return response
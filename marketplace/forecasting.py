@@ -0,0 +1,181 @@
+"""Inventory velocity and days-of-stock forecasting.
+
+Each product's sales velocity (units per day) is an exponentially smoothed
+average of its daily units over the last FORECAST_HISTORY_DAYS complete local
+days, read from the daily product rollups. Smoothing runs on whole batches of
+products at once as NumPy matrix operations. From the velocity we store the
+days of stock left and a reorder point covering the restocking lead time plus
+a safety margin; a product is low on stock once its stock falls to its reorder
+point, so a farm selling hundreds of birds a day is warned early while a
+seller listing a single bull is only warned when it is sold out.
+
+refresh() is incremental: it only recomputes products that are new, edited
+(e.g. stock changed), have rollup changes since their last run, or are still
+selling and therefore need their window rolled forward to today. Run the
+refresh_forecasts command on a schedule (e.g. hourly).
+"""
+import math
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from orders.models import Notification
+from .models import DailyProductSales, Product, ProductForecast
+
+BATCH_SIZE = 2000
+
+
+def alpha():
+    return getattr(settings, 'FORECAST_SMOOTHING_ALPHA', 0.3)
+
+
+def history_days():
+    return getattr(settings, 'FORECAST_HISTORY_DAYS', 90)
+
+
+def cover_days():
+    """Days of sales the reorder point has to cover"""
+    return getattr(settings, 'FORECAST_LEAD_TIME_DAYS', 7) + getattr(settings, 'FORECAST_SAFETY_STOCK_DAYS', 3)
+
+
+# Products at or below their reorder point; products not forecast yet only count once sold out
+LOW_STOCK = Q(stock_quantity__lte=F('forecast__reorder_point')) | Q(stock_quantity=0)
+
+
+def low_stock(products):
+    """Filter a product queryset down to products at or below their reorder point"""
+    return products.filter(LOW_STOCK).select_related('forecast')
+
+
+def smoothed_velocity(units, first_day):
+    """Exponentially smoothed daily units for each row of a (products x days) matrix
+
+    first_day gives, per row, the index of the first day the product was
+    listed; earlier days are ignored and the weights are renormalised so new
+    products are not dragged towards zero by days they did not exist.
+    """
+    days = units.shape[1]
+    a = alpha()
+    # Weight of day t in the smoothed level at the end of the window
+    weights = a * (1 - a) ** np.arange(days - 1, -1, -1, dtype=np.float64)
+    listed = np.arange(days)[None, :] >= first_day[:, None]
+
+    weighted = np.where(listed, weights, 0.0)
+    totals = weighted.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        velocity = (units * weighted).sum(axis=1) / totals
+    return np.nan_to_num(velocity)
+
+
+def stale_products(today):
+    """Products whose forecast is missing or out of date"""
+    changed_sales = DailyProductSales.objects.filter(
+        product=OuterRef('pk'),
+        date__lt=today,
+        updated_at__gt=OuterRef('forecast__computed_at'),
+    )
+    return Product.objects.filter(
+        Q(forecast__isnull=True)
+        | Q(updated_at__gt=F('forecast__computed_at'))
+        | Q(forecast__as_of__lt=today - timedelta(days=1), forecast__velocity__gt=0)
+        | Exists(changed_sales)
+    )
+
+
+def refresh(product_ids=None, full=False):
+    """Recompute forecasts for stale products (or all, or the given ones)
+
+    Returns the number of products refreshed.
+    """
+    now = timezone.now()
+    today = timezone.localdate(now)
+
+    if product_ids is not None:
+        products = Product.objects.filter(pk__in=product_ids)
+    elif full:
+        products = Product.objects.all()
+    else:
+        products = stale_products(today)
+
+    ids = list(products.order_by('pk').values_list('pk', flat=True))
+    for offset in range(0, len(ids), BATCH_SIZE):
+        _refresh_batch(ids[offset:offset + BATCH_SIZE], today, now)
+    return len(ids)
+
+
+def _refresh_batch(product_ids, today, now):
+    last_day = today - timedelta(days=1)  # Today is still in progress
+    days = history_days()
+    window_start = last_day - timedelta(days=days - 1)
+
+    products = list(
+        Product.objects.filter(pk__in=product_ids).order_by('pk').values_list(
+            'pk', 'seller_id', 'name', 'stock_quantity', 'created_at'
+        )
+    )
+    if not products:
+        return
+    row = {product[0]: index for index, product in enumerate(products)}
+
+    units = np.zeros((len(products), days), dtype=np.float64)
+    sales = DailyProductSales.objects.filter(
+        product_id__in=row.keys(), date__range=[window_start, last_day]
+    ).values_list('product_id', 'date', 'units').order_by()
+    for product_id, day, sold in sales:
+        units[row[product_id], (day - window_start).days] = sold
+
+    first_day = np.array([
+        min(max((timezone.localtime(created_at).date() - window_start).days, 0), days - 1)
+        for _, _, _, _, created_at in products
+    ])
+    velocity = smoothed_velocity(units, first_day)
+
+    existing = {
+        forecast.product_id: forecast
+        for forecast in ProductForecast.objects.filter(product_id__in=row.keys())
+    }
+    to_create, to_update, notifications = [], [], []
+
+    for (product_id, seller_id, name, stock, _), rate in zip(products, velocity.tolist()):
+        rate = round(rate, 4)
+        reorder_point = math.ceil(rate * cover_days())
+        is_low = stock <= reorder_point
+
+        forecast = existing.get(product_id) or ProductForecast(product_id=product_id)
+        forecast.velocity = rate
+        forecast.days_of_stock = round(stock / rate, 1) if rate > 0 else None
+        forecast.reorder_point = reorder_point
+        forecast.as_of = last_day
+        forecast.computed_at = now
+
+        if is_low and not forecast.low_stock_notified:
+            notifications.append(Notification(
+                user_id=seller_id,
+                notification_type='low_stock',
+                title="Low Stock",
+                message=low_stock_message(name, stock, forecast.days_of_stock),
+            ))
+        forecast.low_stock_notified = is_low
+
+        (to_update if forecast.pk else to_create).append(forecast)
+
+    with transaction.atomic():
+        ProductForecast.objects.bulk_create(to_create, batch_size=500)
+        ProductForecast.objects.bulk_update(
+            to_update,
+            ['velocity', 'days_of_stock', 'reorder_point', 'low_stock_notified', 'as_of', 'computed_at'],
+            batch_size=500,
+        )
+        Notification.objects.bulk_create(notifications, batch_size=500)
+
+
+def low_stock_message(name, stock, days_of_stock):
+    if stock == 0:
+        return f"{name} is out of stock."
+    if days_of_stock is None:
+        return f"{name} is running low ({stock} left)."
+    return f"{name} is running low: {stock} left, about {days_of_stock:g} days of sales at the current rate."
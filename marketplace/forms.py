@@ -3,6 +3,7 @@ from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserChangeForm
 from .models import Product, Category
+from accounts import phones
 from orders.models import Order
 
 class UserProfileForm(UserChangeForm):
@@ -34,40 +35,6 @@ class UserProfileForm(UserChangeForm):
             'placeholder': 'Enter your email address'
         })
 
-class PhoneForm(forms.Form):
-    phone = forms.CharField(
-        max_length=20,
-        required=True,
-        widget=forms.TextInput(attrs={
-            'class': 'form-control',
-            'placeholder': '+250789123456 or 0789123456',
-        }),
-        help_text="Required for order updates, delivery coordination, and account security"
-    )
-    
-    def clean_phone(self):
-        phone = self.cleaned_data.get('phone')
-        if phone:
-            # Basic phone validation
-            import re
-            # Remove any non-digit characters except +
-            cleaned_phone = re.sub(r'[^\d+]', '', phone)
-            
-            # Check if it's a valid Rwandan phone number format
-            if not re.match(r'^(\+?250|0)?[7][0-9]{8}$', cleaned_phone):
-                raise forms.ValidationError("Please enter a valid Rwandan phone number (e.g., +250789123456 or 0789123456)")
-            
-            # Format to standard format
-            if cleaned_phone.startswith('0'):
-                cleaned_phone = '+25' + cleaned_phone[1:]
-            elif cleaned_phone.startswith('250'):
-                cleaned_phone = '+' + cleaned_phone
-            elif not cleaned_phone.startswith('+'):
-                cleaned_phone = '+25' + cleaned_phone
-            
-            return cleaned_phone
-        return phone
-
 class CategoryForm(forms.ModelForm):
     class Meta:
         model = Category
@@ -372,73 +339,13 @@ class CheckoutForm(forms.ModelForm):
         })
 
     def clean_customer_phone(self):
-        phone = self.cleaned_data.get('customer_phone')
-        if phone:
-            # Basic phone validation
-            import re
-            # Remove any non-digit characters except +
-            cleaned_phone = re.sub(r'[^\d+]', '', phone)
-
-            # Check if it's a valid Rwandan phone number format
-            if not re.match(r'^(\+?250|0)?[7][0-9]{8}$', cleaned_phone):
-                raise forms.ValidationError("Please enter a valid Rwandan phone number (e.g., +250789123456 or 0789123456)")
-
-            # Format to standard format
-            if cleaned_phone.startswith('0'):
-                cleaned_phone = '+25' + cleaned_phone[1:]
-            elif cleaned_phone.startswith('250'):
-                cleaned_phone = '+' + cleaned_phone
-            elif not cleaned_phone.startswith('+'):
-                cleaned_phone = '+25' + cleaned_phone
-
-            return cleaned_phone
-        return phone
+        return phones.clean(self.cleaned_data.get('customer_phone'))
 
     def clean_shipping_phone(self):
-        phone = self.cleaned_data.get('shipping_phone')
-        if phone:
-            # Basic phone validation
-            import re
-            # Remove any non-digit characters except +
-            cleaned_phone = re.sub(r'[^\d+]', '', phone)
-
-            # Check if it's a valid Rwandan phone number format
-            if not re.match(r'^(\+?250|0)?[7][0-9]{8}$', cleaned_phone):
-                raise forms.ValidationError("Please enter a valid Rwandan phone number (e.g., +250789123456 or 0789123456)")
-
-            # Format to standard format
-            if cleaned_phone.startswith('0'):
-                cleaned_phone = '+25' + cleaned_phone[1:]
-            elif cleaned_phone.startswith('250'):
-                cleaned_phone = '+' + cleaned_phone
-            elif not cleaned_phone.startswith('+'):
-                cleaned_phone = '+25' + cleaned_phone
-
-            return cleaned_phone
-        return phone
+        return phones.clean(self.cleaned_data.get('shipping_phone'))
 
     def clean_mtn_phone(self):
-        phone = self.cleaned_data.get('mtn_phone')
-        if phone:
-            # Basic phone validation
-            import re
-            # Remove any non-digit characters except +
-            cleaned_phone = re.sub(r'[^\d+]', '', phone)
-
-            # Check if it's a valid Rwandan phone number format
-            if not re.match(r'^(\+?250|0)?[7][0-9]{8}$', cleaned_phone):
-                raise forms.ValidationError("Please enter a valid Rwandan phone number (e.g., +250789123456 or 0789123456)")
-
-            # Format to standard format
-            if cleaned_phone.startswith('0'):
-                cleaned_phone = '+25' + cleaned_phone[1:]
-            elif cleaned_phone.startswith('250'):
-                cleaned_phone = '+' + cleaned_phone
-            elif not cleaned_phone.startswith('+'):
-                cleaned_phone = '+25' + cleaned_phone
-
-            return cleaned_phone
-        return phone
+        return phones.clean(self.cleaned_data.get('mtn_phone'))
 
     def clean(self):
         cleaned_data = super().clean()
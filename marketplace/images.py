@@ -0,0 +1,284 @@
+"""Resized WebP and JPEG derivatives of uploaded product and category photos.
+
+Listing pages used to shrink full-size camera photos with CSS. Every image
+now gets fixed-width derivatives (THUMBNAIL_WIDTHS) in WebP and JPEG, stored
+next to the original, in the image fields' storage (media_storage), under
+a name derived from it:
+
+    products/cow.jpg -> thumbs/products/cow-320w.webp, thumbs/products/cow-320w.jpg, ...
+
+so templates can build srcset lists from the original's name alone, without
+touching storage. Images narrower than a width are not upscaled; that
+derivative is simply a re-encoded copy.
+
+Derivatives of new uploads are generated off the request by a small thread
+pool (IMAGE_WORKERS; 0 runs them inline, e.g. in tests): the product is
+saved with image_status "processing", which templates show as a
+placeholder, and turns "ready" (or "failed") once its derivatives exist.
+The rebuild_thumbnails command generates them for existing media.
+
+The same workers store a tiny (PLACEHOLDER_WIDTH px) WebP preview of each
+product's main image in image_placeholder as a data: URI. Listings inline
+it as the image background, so cards paint a blurred preview without an
+extra request while the real image loads; build_placeholders fills it in
+for existing products.
+
+Image files are content-addressed (marketplace.storage) and may be shared by
+several products, so MediaBlob counts the image fields referencing each one.
+The model signals acquire and release references as images are set, replaced
+and deleted; a file and its derivatives are deleted with its last reference.
+"""
+import base64
+import logging
+import posixpath
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from PIL import Image, ImageOps
+
+from .models import Category, MediaBlob, Product
+from .storage import media_storage
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}  # Extension: Pillow format
+PREFIX = 'thumbs'
+PLACEHOLDER_WIDTH = 16
+
+# Image fields that get derivatives, per model
+IMAGE_FIELDS = {
+    Product: ('image', 'image2', 'image3'),
+    Category: ('image',),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def workers():
+    return getattr(settings, 'IMAGE_WORKERS', 2)
+
+
+def widths():
+    return sorted(getattr(settings, 'THUMBNAIL_WIDTHS', [320, 640, 960]))
+
+
+def quality():
+    return getattr(settings, 'THUMBNAIL_QUALITY', 80)
+
+
+def derivative_name(name, width, extension):
+    root, _ = posixpath.splitext(name)
+    return f'{PREFIX}/{root}-{width}w.{extension}'
+
+
+def has_derivatives(name):
+    """Whether the derivatives of an image have been generated (checks the last one written)"""
+    return media_storage().exists(derivative_name(name, widths()[-1], 'jpg'))
+
+
+def _flatten(image):
+    """RGB copy of an image, with any transparency composited onto white"""
+    image = ImageOps.exif_transpose(image)  # Phone photos are often stored sideways
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def generate(name):
+    """Write every derivative of the stored image name; returns the names written
+
+    Derivatives are written largest-first per format so has_derivatives()
+    only reports an image once all of its files exist.
+    """
+    with media_storage().open(name, 'rb') as source:
+        original = _flatten(Image.open(source))
+
+    written = []
+    for width in reversed(widths()):
+        if width < original.width:
+            height = round(original.height * width / original.width)
+            resized = original.resize((width, height), Image.LANCZOS)
+        else:
+            resized = original
+        for extension, image_format in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, image_format, quality=quality(), optimize=True)
+            target = derivative_name(name, width, extension)
+            media_storage().delete(target)  # Names are deterministic; never let storage rename
+            written.append(media_storage().save_named(target, ContentFile(buffer.getvalue())))
+    return written
+
+
+def process(name):
+    """generate() for upload hooks: failures are logged, not raised; returns success"""
+    try:
+        generate(name)
+    except FileNotFoundError:
+        logger.warning("Image %s is missing from storage", name)
+        return False
+    except Exception:
+        logger.exception("Could not generate derivatives of %s", name)
+        return False
+    return True
+
+
+def placeholder(name):
+    """data: URI of a tiny WebP preview of a stored image, or '' if it cannot be read"""
+    try:
+        with media_storage().open(name, 'rb') as source:
+            image = Image.open(source)
+            image.draft('RGB', (PLACEHOLDER_WIDTH * 8, PLACEHOLDER_WIDTH * 8))  # Lets JPEGs decode at reduced scale
+            image = _flatten(image)
+    except FileNotFoundError:
+        logger.warning("Image %s is missing from storage", name)
+        return ''
+    except Exception:
+        logger.exception("Could not build a placeholder for %s", name)
+        return ''
+    image.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+    buffer = BytesIO()
+    image.save(buffer, 'WEBP', quality=50)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def url(name, width, extension):
+    return media_storage().url(derivative_name(name, width, extension))
+
+
+def srcset(name, extension):
+    return ', '.join(f'{url(name, width, extension)} {width}w' for width in widths())
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers(), thread_name_prefix='image')
+    return _executor
+
+
+def schedule(instance, changed):
+    """Generate derivatives and the placeholder of changed images ({field: name}) once the upload is committed"""
+    model = instance._meta.concrete_model
+    names = [name for name in changed.values() if name and not has_derivatives(name)]
+    updates = {}
+    if names and hasattr(model, 'image_status'):
+        updates['image_status'] = 'processing'
+    if 'image' in changed and hasattr(model, 'image_placeholder'):
+        updates['image_placeholder'] = ''  # Stale; run() builds the new one
+    if not updates and not names:
+        return
+    if updates:
+        model.objects.filter(pk=instance.pk).update(**updates)
+        for field, value in updates.items():
+            setattr(instance, field, value)
+
+    def task():
+        return run(model, instance.pk, names)
+
+    def inline():
+        for field, value in task().items():
+            setattr(instance, field, value)
+
+    if workers() > 0:
+        transaction.on_commit(lambda: get_executor().submit(task))
+    else:
+        transaction.on_commit(inline)
+
+
+def run(model, pk, names):
+    """Worker side of schedule(): generate, then record and return the instance's image fields to update"""
+    try:
+        failed = [name for name in names if not process(name)]
+        fields = [field for field in ('image_status', 'image_placeholder') if hasattr(model, field)]
+        if not fields:
+            return {}
+        current = model.objects.filter(pk=pk).values(*IMAGE_FIELDS[model], *fields).first()
+        if current is None:
+            return {}  # Deleted meanwhile
+
+        updates = {}
+        if 'image_placeholder' in current and current['image'] and not current['image_placeholder']:
+            updates['image_placeholder'] = placeholder(current['image'])
+        if 'image_status' in current:
+            if failed:
+                updates['image_status'] = 'failed'
+            elif all(has_derivatives(current[field]) for field in IMAGE_FIELDS[model] if current[field]):
+                updates['image_status'] = 'ready'
+            # Otherwise a newer upload is still being processed and will set the status
+        if updates:
+            model.objects.filter(pk=pk).update(**updates)
+        return updates
+    finally:
+        if workers() > 0:
+            connections.close_all()
+
+
+def stored_names():
+    """Distinct names of every product and category image"""
+    names = set()
+    for model, fields in IMAGE_FIELDS.items():
+        for field in fields:
+            names.update(model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).values_list(field, flat=True))
+    return sorted(names)
+
+
+def loaded_names(instance):
+    """{field: image name} for the image fields loaded on an instance
+
+    Reads the raw field values so deferred fields are skipped rather than
+    fetched one query per instance.
+    """
+    names = {}
+    for field in IMAGE_FIELDS[instance._meta.concrete_model]:
+        if field in instance.__dict__:
+            value = instance.__dict__[field]
+            names[field] = getattr(value, 'name', value) or ''
+    return names
+
+
+def acquire(names):
+    """Add one reference per occurrence of each image name"""
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+    MediaBlob.objects.bulk_create([MediaBlob(name=name) for name in counts], ignore_conflicts=True)
+    for name, count in counts.items():
+        MediaBlob.objects.filter(name=name).update(refs=F('refs') + count)
+
+
+def release(names):
+    """Drop one reference per occurrence; files left without references are deleted after commit"""
+    counts = Counter(name for name in names if name)
+    if not counts:
+        return
+    with transaction.atomic():
+        for name, count in counts.items():
+            MediaBlob.objects.filter(name=name).update(refs=Greatest(F('refs') - count, 0))
+        unused = list(
+            MediaBlob.objects.select_for_update().filter(name__in=counts, refs=0).values_list('name', flat=True)
+        )
+        MediaBlob.objects.filter(name__in=unused).delete()
+    if unused:
+        transaction.on_commit(lambda: delete_files(unused))
+
+
+def delete_files(names):
+    for name in names:
+        if MediaBlob.objects.filter(name=name).exists():
+            continue  # Uploaded again since it was released
+        media_storage().delete(name)
+        for width in widths():
+            for extension in FORMATS:
+                media_storage().delete(derivative_name(name, width, extension))
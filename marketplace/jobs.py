@@ -0,0 +1,118 @@
+"""Background admin report generation.
+
+start() records a ReportJob and hands it to an in-process thread pool so the
+request returns immediately with a job id; clients poll the job for progress
+and fetch the data once it is done. Identical in-flight requests are coalesced
+onto one job by a partial unique constraint on the job key, so each distinct
+report is computed once however many admins ask for it at the same time.
+
+REPORT_JOB_WORKERS sets the pool size (0 runs jobs inline, e.g. in tests) and
+REPORT_JOB_TIMEOUT_SECONDS marks jobs abandoned by a dead worker as failed.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.utils import timezone
+
+from livestockhub import replicas
+
+from . import reports
+from .models import ReportJob
+
+logger = logging.getLogger(__name__)
+
+FINISHED_RETENTION = timedelta(days=1)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def workers():
+    return getattr(settings, 'REPORT_JOB_WORKERS', 2)
+
+
+def timeout():
+    return timedelta(seconds=getattr(settings, 'REPORT_JOB_TIMEOUT_SECONDS', 600))
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=workers(), thread_name_prefix='report-job')
+    return _executor
+
+
+def job_key(report_type, period, start_date, end_date):
+    return '|'.join([reports.PLATFORM_SCOPE, report_type, period, start_date.isoformat(), end_date.isoformat()])
+
+
+def start(report_type, period, start_date, end_date, user):
+    """Return the in-flight job for this report, creating and queueing one if needed"""
+    period = reports.normalize_period(period)
+    key = job_key(report_type, period, start_date, end_date)
+    now = timezone.now()
+
+    # Jobs whose worker died never finish; free their key
+    ReportJob.objects.filter(
+        key=key, status__in=ReportJob.ACTIVE_STATUSES, updated_at__lt=now - timeout()
+    ).update(status='failed', error='Timed out', updated_at=now)
+    ReportJob.objects.filter(
+        status__in=['done', 'failed'], updated_at__lt=now - FINISHED_RETENTION
+    ).delete()
+
+    try:
+        with transaction.atomic():
+            job = ReportJob.objects.create(
+                key=key,
+                report_type=report_type,
+                period=period,
+                start_date=start_date,
+                end_date=end_date,
+                requested_by=user,
+            )
+    except IntegrityError:
+        # Someone else is already generating this report
+        job = ReportJob.objects.filter(key=key, status__in=ReportJob.ACTIVE_STATUSES).first()
+        if job is not None:
+            return job
+        return start(report_type, period, start_date, end_date, user)  # It finished in between
+
+    if workers() > 0:
+        transaction.on_commit(lambda: get_executor().submit(run, job.pk))
+    else:
+        transaction.on_commit(lambda: run(job.pk))
+    return job
+
+
+def run(job_id):
+    """Generate the report for a job, recording progress as it goes"""
+    def set_progress(progress):
+        ReportJob.objects.filter(pk=job_id).update(progress=progress, updated_at=timezone.now())
+
+    try:
+        job = ReportJob.objects.get(pk=job_id)
+        ReportJob.objects.filter(pk=job_id).update(status='running', progress=5, updated_at=timezone.now())
+
+        with replicas.reads():  # The aggregates may come from a read replica
+            data = reports.get_or_generate(
+                job.report_type, job.period, job.start_date, job.end_date,
+                scope=reports.PLATFORM_SCOPE,
+                user=job.requested_by,
+                build=lambda: reports.build_admin_report(
+                    job.report_type, job.period, job.start_date, job.end_date, progress=set_progress
+                )
+            )
+        ReportJob.objects.filter(pk=job_id).update(
+            status='done', progress=100, data=data, updated_at=timezone.now()
+        )
+    except Exception as e:
+        logger.exception("Report job %s failed", job_id)
+        ReportJob.objects.filter(pk=job_id).update(status='failed', error=str(e), updated_at=timezone.now())
+    finally:
+        if workers() > 0:
+            connections.close_all()
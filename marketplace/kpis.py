@@ -0,0 +1,81 @@
+"""Platform KPI snapshot shared by the admin dashboards.
+
+snapshot() computes every platform counter shown on the admin dashboard and
+admin reports with one conditional-aggregate query per table, and caches the
+result for KPI_SNAPSHOT_TTL_SECONDS. Creating or deleting a user, product
+or order, or saving one of the COUNTED_FIELDS, drops the cached snapshot
+once the transaction commits (see signals), so counters are fresh after
+local writes. The TTL bounds the staleness of the time- and stock-based
+counters and of processes that do not share the cache backend.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from orders.models import Order
+from . import forecasting, rollups
+from .models import DailySellerSales, Product
+
+CACHE_KEY = 'marketplace:kpi_snapshot'
+ACTIVE_DAYS = 30
+
+# Fields the counters filter or group on, per model label
+COUNTED_FIELDS = {
+    'accounts.User': {'user_type', 'is_seller_approved', 'is_active'},
+    'marketplace.Product': {'is_active', 'seller'},
+    'orders.Order': {'status'},
+}
+
+
+def ttl():
+    return getattr(settings, 'KPI_SNAPSHOT_TTL_SECONDS', 60)
+
+
+def compute():
+    """Compute the platform counters from the database"""
+    now = timezone.now()
+    active_since, _ = rollups.day_bounds(timezone.localdate(now) - timedelta(days=ACTIVE_DAYS))
+    recently_active = Q(last_login__gte=active_since)
+
+    users = get_user_model().objects.aggregate(
+        total_users=Count('id'),
+        active_users=Count('id', filter=recently_active),
+        total_sellers=Count('id', filter=Q(user_type='seller')),
+        pending_sellers=Count('id', filter=Q(user_type='seller', is_seller_approved=False)),
+    )
+    products = Product.objects.aggregate(
+        total_products=Count('id'),
+        active_products=Count('id', filter=Q(is_active=True)),
+        low_stock_products=Count('id', filter=forecasting.LOW_STOCK),
+        active_sellers=Count('seller', distinct=True, filter=Q(seller__last_login__gte=active_since)),
+    )
+    orders = Order.objects.aggregate(
+        total_orders=Count('id'),
+        pending_orders=Count('id', filter=Q(status='pending')),
+    )
+    revenue = DailySellerSales.objects.aggregate(total=Sum('revenue'))['total'] or 0
+
+    return {
+        **users,
+        **products,
+        **orders,
+        'total_revenue': float(revenue),
+        'computed_at': now.isoformat(),
+    }
+
+
+def snapshot():
+    """Return the cached KPI snapshot, computing it on a miss"""
+    data = cache.get(CACHE_KEY)
+    if data is None:
+        data = compute()
+        cache.set(CACHE_KEY, data, ttl())
+    return data
+
+
+def invalidate():
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,122 @@
+"""Materialised top-sellers leaderboard.
+
+SellerLeaderboard holds one row per seller and period (7d, 30d, all-time)
+with delivered revenue, orders and units summed from the daily seller
+rollups, the seller's rating and their rank. Rows of sellers whose delivered
+totals change are refreshed as part of the rollup flush and left unranked
+(rank 0); ensure_current() ranks them in one pass per period before the
+leaderboard is read, so a burst of deliveries costs one re-rank rather than
+one per order. The 7d/30d windows roll forward once per day through
+ensure_current() or the refresh_leaderboard command.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from accounts.models import SellerProfile
+from .models import DailySellerSales, SellerLeaderboard
+
+PERIOD_DAYS = {
+    '7d': 7,
+    '30d': 30,
+    'all': None,
+}
+
+WINDOWED_PERIODS = [period for period, days in PERIOD_DAYS.items() if days]
+
+FIELDS = ['revenue', 'orders', 'units', 'avg_rating', 'as_of']
+
+
+def _totals(period, today, seller_ids=None):
+    sales = DailySellerSales.objects.filter(delivered_revenue__gt=0)
+    days = PERIOD_DAYS[period]
+    if days:
+        sales = sales.filter(date__gt=today - timedelta(days=days), date__lte=today)
+    if seller_ids is not None:
+        sales = sales.filter(seller_id__in=seller_ids)
+
+    return sales.values('seller').annotate(
+        revenue=Sum('delivered_revenue'),
+        orders=Sum('delivered_orders'),
+        units=Sum('delivered_units'),
+    ).order_by()
+
+
+def rerank(period):
+    """Rewrite ranks for a period, touching only rows whose rank moved"""
+    entries = SellerLeaderboard.objects.filter(period=period).order_by(
+        '-revenue', '-orders', 'seller_id'
+    ).only('id', 'rank')
+
+    changed = []
+    for position, entry in enumerate(entries, start=1):
+        if entry.rank != position:
+            entry.rank = position
+            changed.append(entry)
+    SellerLeaderboard.objects.bulk_update(changed, ['rank'], batch_size=500)
+
+
+def refresh(seller_ids=None, periods=None, rank=True):
+    """Recompute leaderboard rows for some sellers (or everyone)
+
+    Only rows whose values changed are written. With rank=False the changed
+    rows are left for ensure_current() to rank, unless rows were removed.
+    """
+    if seller_ids is not None:
+        seller_ids = set(seller_ids)
+        if not seller_ids:
+            return
+    today = timezone.localdate()
+
+    with transaction.atomic():
+        for period in periods or PERIOD_DAYS:
+            rows = {row['seller']: row for row in _totals(period, today, seller_ids)}
+            ratings = dict(
+                SellerProfile.objects.filter(user_id__in=rows.keys()).values_list('user_id', 'rating')
+            )
+
+            stale = SellerLeaderboard.objects.filter(period=period).exclude(seller_id__in=rows.keys())
+            if seller_ids is not None:
+                stale = stale.filter(seller_id__in=seller_ids)
+            removed, _ = stale.delete()
+
+            entries = {
+                entry.seller_id: entry
+                for entry in SellerLeaderboard.objects.filter(period=period, seller_id__in=rows.keys())
+            }
+            created, changed, now = [], [], timezone.now()
+            for seller_id, row in rows.items():
+                values = dict(zip(FIELDS, (row['revenue'], row['orders'], row['units'], ratings.get(seller_id), today)))
+                entry = entries.get(seller_id)
+                if entry is None:
+                    created.append(SellerLeaderboard(period=period, seller_id=seller_id, **values))
+                elif any(getattr(entry, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(entry, field, value)
+                    entry.rank = 0
+                    entry.updated_at = now
+                    changed.append(entry)
+            SellerLeaderboard.objects.bulk_create(created, batch_size=500)
+            SellerLeaderboard.objects.bulk_update(changed, [*FIELDS, 'rank', 'updated_at'], batch_size=500)
+
+            if rank or removed:
+                rerank(period)
+
+
+def ensure_current():
+    """Roll the 7d/30d windows forward if they were last computed before today and rank unranked rows"""
+    today = timezone.localdate()
+    if SellerLeaderboard.objects.filter(period__in=WINDOWED_PERIODS, as_of__lt=today).exists():
+        refresh(periods=WINDOWED_PERIODS)
+
+    unranked = SellerLeaderboard.objects.filter(period__in=PERIOD_DAYS, rank=0).values_list('period', flat=True)
+    for period in set(unranked):
+        with transaction.atomic():  # Ranks from the primary's totals
+            rerank(period)
+
+
+def top(period, limit=5):
+    """Top sellers for a period, read with one indexed query"""
+    return SellerLeaderboard.objects.filter(period=period).select_related('seller').order_by('rank')[:limit]
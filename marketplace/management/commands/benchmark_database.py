@@ -0,0 +1,118 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from livestockhub import database
+
+# SQLite setups to compare, as livestockhub.database builds them, with the
+# journal mode of the database file
+SETUPS = {
+    'default': (database.sqlite('', pragmas={}, timeout=5, transaction_mode=None), 'DELETE'),  # Django's defaults
+    'wal': (database.sqlite('', pragmas={'synchronous': 'NORMAL'}, timeout=5, transaction_mode=None), 'WAL'),
+    'tuned': (database.sqlite(''), database.JOURNAL_MODE),
+}
+
+
+def connect(path, options):
+    """A sqlite3 connection set up the way Django's backend (and database.tune_wal) sets one up from OPTIONS"""
+    connection = sqlite3.connect(path, timeout=options['timeout'], isolation_level=None, check_same_thread=False)
+    for command in options.get('init_command', '').split(';'):
+        if command.strip():
+            connection.execute(command)
+    database.wal_pragmas(connection)
+    return connection
+
+
+class Command(BaseCommand):
+    help = "Compare SQLite settings under concurrent checkout-style writers and catalogue readers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help="Threads placing orders")
+        parser.add_argument('--readers', type=int, default=4, help="Threads reading the catalogue")
+        parser.add_argument('--transactions', type=int, default=200, help="Orders per writer")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'setup':<10}{'orders/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'locked':>9}{'reads/s':>10}"
+        )
+        for name, (settings_dict, journal_mode) in SETUPS.items():
+            with tempfile.TemporaryDirectory() as directory:
+                result = self.measure(Path(directory) / 'bench.sqlite3', settings_dict['OPTIONS'], journal_mode, options)
+            latencies = sorted(result['latencies']) or [0]
+            self.stdout.write(
+                f"{name:<10}{len(result['latencies']) / result['elapsed']:>10.0f}"
+                f"{latencies[len(latencies) // 2] * 1000:>10.2f}{latencies[int(len(latencies) * 0.95)] * 1000:>10.2f}"
+                f"{result['locked']:>9}{result['reads'] / result['elapsed']:>10.0f}"
+            )
+
+    def measure(self, path, sqlite_options, journal_mode, options):
+        """Run writers and readers against a fresh database file; returns their counts and timings"""
+        setup = connect(path, sqlite_options)
+        setup.execute(f'PRAGMA journal_mode={journal_mode}')  # What enable_wal does
+        setup.executescript("""
+            CREATE TABLE product (id INTEGER PRIMARY KEY, name TEXT, stock INTEGER);
+            CREATE TABLE orders (id INTEGER PRIMARY KEY, product_id INTEGER, quantity INTEGER, created REAL);
+        """)
+        setup.executemany("INSERT INTO product (name, stock) VALUES (?, ?)", [(f'product {i}', 10 ** 6) for i in range(500)])
+        setup.close()
+
+        begin = f"BEGIN {sqlite_options.get('transaction_mode', '')}".strip()
+        result = {'latencies': [], 'locked': 0, 'reads': 0}
+        lock = threading.Lock()
+        writing = threading.Event()
+
+        def write(worker):
+            connection = connect(path, sqlite_options)
+            for n in range(options['transactions']):
+                product_id = (worker * 7919 + n) % 500 + 1
+                start = time.perf_counter()
+                try:
+                    # The shape of checkout: read stock, then decrement it and record the order
+                    connection.execute(begin)
+                    stock = connection.execute("SELECT stock FROM product WHERE id = ?", [product_id]).fetchone()[0]
+                    connection.execute("UPDATE product SET stock = ? WHERE id = ?", [stock - 1, product_id])
+                    connection.execute("INSERT INTO orders (product_id, quantity, created) VALUES (?, 1, ?)", [product_id, time.time()])
+                    connection.execute("COMMIT")
+                except sqlite3.OperationalError as e:
+                    if connection.in_transaction:
+                        connection.execute("ROLLBACK")
+                    if 'locked' not in str(e) and 'busy' not in str(e):
+                        raise
+                    with lock:
+                        result['locked'] += 1
+                    continue
+                with lock:
+                    result['latencies'].append(time.perf_counter() - start)
+            connection.close()
+
+        def read():
+            connection = connect(path, sqlite_options)
+            reads = 0
+            while writing.is_set():
+                try:
+                    connection.execute("SELECT id, name, stock FROM product WHERE stock > 0 ORDER BY id LIMIT 24").fetchall()
+                    connection.execute("SELECT COUNT(*) FROM orders").fetchone()
+                    reads += 1
+                except sqlite3.OperationalError:
+                    pass
+            connection.close()
+            with lock:
+                result['reads'] += reads
+
+        writing.set()
+        readers = [threading.Thread(target=read) for _ in range(options['readers'])]
+        writers = [threading.Thread(target=write, args=[i]) for i in range(options['writers'])]
+        start = time.perf_counter()
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        result['elapsed'] = time.perf_counter() - start
+        writing.clear()
+        for thread in readers:
+            thread.join()
+        return result
@@ -0,0 +1,41 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from marketplace import images
+from marketplace.models import Product
+
+
+class Command(BaseCommand):
+    help = "Store tiny inline previews of existing product images in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (default: one per CPU)")
+        parser.add_argument('--all', action='store_true', help="Rebuild every placeholder, not only missing ones")
+
+    def handle(self, *args, **options):
+        products = Product.objects.exclude(image='')
+        if not options['all']:
+            products = products.filter(image_placeholder='')
+        # Content-addressed images are shared, so build one preview per file
+        names = sorted(set(products.values_list('image', flat=True)))
+        if not names:
+            self.stdout.write("No images to process.")
+            return
+
+        built = {}
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            for name, preview in zip(names, pool.map(images.placeholder, names, chunksize=8)):
+                if preview:
+                    built[name] = preview
+                else:
+                    self.stderr.write(f"Failed: {name}")
+
+        with transaction.atomic():
+            for name, preview in built.items():
+                products.filter(image=name).update(image_placeholder=preview)
+
+        self.stdout.write(self.style.SUCCESS(f"Stored placeholders for {len(built)} images ({len(names) - len(built)} failed)."))
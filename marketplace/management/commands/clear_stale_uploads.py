@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from marketplace import uploads
+from marketplace.models import ChunkedUpload
+
+
+class Command(BaseCommand):
+    help = "Delete resumable uploads that received nothing for a while, and their partial files (run on a schedule, e.g. daily)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help="Idle time after which an upload is abandoned")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        deleted = 0
+        for upload in ChunkedUpload.objects.filter(updated_at__lt=cutoff).iterator():
+            uploads.discard(upload)
+            deleted += 1
+
+        # Partial files whose row is gone, e.g. with a deleted seller account
+        known = {str(pk) for pk in ChunkedUpload.objects.values_list('pk', flat=True)}
+        orphans = 0
+        if uploads.directory().exists():
+            for path in uploads.directory().glob('*.part'):
+                if path.stem not in known and path.stat().st_mtime < cutoff.timestamp():
+                    path.unlink(missing_ok=True)
+                    orphans += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} stale uploads and {orphans} orphaned partial files."))
@@ -0,0 +1,29 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database to a replica file with SQLite's online backup API (e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', nargs='?', help="Replica file (default: the 'replica' database's NAME)")
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError("Only SQLite primaries can be copied; use the database's own replication otherwise.")
+        target = options['target'] or (connections['replica'].settings_dict['NAME'] if 'replica' in settings.DATABASES else None)
+        if not target:
+            raise CommandError("Give a target file or configure DATABASE_REPLICA_URL.")
+
+        primary.ensure_connection()
+        replica = sqlite3.connect(target, timeout=30)
+        try:
+            # One step: a consistent snapshot that, in WAL mode, does not block writers
+            primary.connection.backup(replica)
+        finally:
+            replica.close()
+        self.stdout.write(self.style.SUCCESS(f"Copied {primary.settings_dict['NAME']} to {target}."))
@@ -0,0 +1,101 @@
+import posixpath
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from marketplace import images
+from marketplace.models import MediaBlob
+from marketplace.storage import content_addressed, content_hash, hashed_name
+
+
+def walk(directory):
+    """Every file name below a storage directory"""
+    directories, files = content_addressed.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for subdirectory in directories:
+        yield from walk(posixpath.join(directory, subdirectory))
+
+
+class Command(BaseCommand):
+    help = "Move existing images to content-addressed names, merging duplicates, and rebuild reference counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete-orphans', action='store_true',
+                            help="Also delete files in the upload directories that no product or category uses")
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without changing it")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        renamed = {}
+        written = 0
+        for name in images.stored_names():
+            if not content_addressed.exists(name):
+                self.stderr.write(f"Missing, left as is: {name}")
+                continue
+            upload_name = f"{name.split('/')[0]}/{posixpath.basename(name)}"  # Older uploads sit in products/main/ etc.
+            with content_addressed.open(name, 'rb') as file:
+                new_name = hashed_name(upload_name, content_hash(file))
+                if new_name == name:
+                    continue
+                if not content_addressed.exists(new_name) and not dry_run:
+                    new_name = content_addressed.save(upload_name, file)
+                    written += content_addressed.size(new_name)
+            renamed[name] = new_name
+            if not dry_run:
+                self.move_derivatives(name, new_name)
+
+        blobs = len(set(renamed.values()))
+        self.stdout.write(f"{len(renamed)} images map to {blobs} content-addressed files.")
+        if dry_run:
+            return
+
+        with transaction.atomic():
+            for model, fields in images.IMAGE_FIELDS.items():
+                for field in fields:
+                    for old, new in renamed.items():
+                        model.objects.filter(**{field: old}).update(**{field: new})
+            self.rebuild_counts()
+
+        freed = 0
+        for old in renamed:
+            freed += content_addressed.size(old)
+            content_addressed.delete(old)
+
+        if options['delete_orphans']:
+            used = set(MediaBlob.objects.values_list('name', flat=True))
+            for directory in ('products', 'categories'):
+                if not content_addressed.exists(directory):
+                    continue
+                for name in walk(directory):
+                    if name not in used:
+                        freed += content_addressed.size(name)
+                        content_addressed.delete(name)
+                        self.stdout.write(f"Deleted unused {name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Media deduplicated; {(freed - written) / 1024 / 1024:.1f} MB freed."))
+
+    def move_derivatives(self, old, new):
+        """Derivatives of identical content are identical, so reuse rather than regenerate them"""
+        for width in images.widths():
+            for extension in images.FORMATS:
+                source = images.derivative_name(old, width, extension)
+                if not content_addressed.exists(source):
+                    continue
+                target = images.derivative_name(new, width, extension)
+                if not content_addressed.exists(target):
+                    with content_addressed.open(source, 'rb') as file:
+                        content_addressed.save_named(target, file)
+                content_addressed.delete(source)
+
+    def rebuild_counts(self):
+        refs = Counter()
+        for model, fields in images.IMAGE_FIELDS.items():
+            for field in fields:
+                refs.update(
+                    model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                    .values_list(field, flat=True)
+                )
+        MediaBlob.objects.all().delete()
+        MediaBlob.objects.bulk_create([MediaBlob(name=name, refs=count) for name, count in refs.items()], batch_size=500)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from livestockhub import database
+
+
+class Command(BaseCommand):
+    help = "Switch a SQLite database file to write-ahead logging; the mode is stored in the file, so run it once per database"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help="Database alias (default: 'default')")
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError("Only SQLite databases have a journal mode.")
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA journal_mode={database.JOURNAL_MODE}')
+            mode = cursor.fetchone()[0]
+        if mode.upper() != database.JOURNAL_MODE:
+            raise CommandError(f"{connection.settings_dict['NAME']} stayed in {mode} mode (in-memory databases can not use WAL).")
+        self.stdout.write(self.style.SUCCESS(f"{connection.settings_dict['NAME']} uses {mode} journaling."))
@@ -0,0 +1,29 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from marketplace import leaderboard, rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily seller, product and category sales rollups from order history"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First local date to rebuild (YYYY-MM-DD). Defaults to all history.")
+        parser.add_argument('--end', help="Last local date to rebuild (YYYY-MM-DD). Defaults to today.")
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        if start and end and start > end:
+            raise CommandError("--start must not be after --end")
+
+        written = rollups.rebuild(start, end)
+        leaderboard.refresh()
+        for name, count in written.items():
+            self.stdout.write(f"{name}: {count} rows")
+        self.stdout.write(self.style.SUCCESS("Sales rollups rebuilt."))
@@ -0,0 +1,44 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from marketplace import images
+from marketplace.models import Product
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG derivatives for existing product and category images in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes (default: one per CPU)")
+        parser.add_argument('--missing', action='store_true', help="Only images that have no derivatives yet")
+
+    def handle(self, *args, **options):
+        names = images.stored_names()
+        if options['missing']:
+            names = [name for name in names if not images.has_derivatives(name)]
+        if not names:
+            self.stdout.write("No images to process.")
+            return
+
+        # Resizing is CPU-bound, so use processes rather than threads; workers
+        # only read and write storage and never touch the database
+        done, failed = 0, []
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            for name, ok in zip(names, pool.map(images.process, names, chunksize=4)):
+                if ok:
+                    done += 1
+                else:
+                    failed.append(name)
+                    self.stderr.write(f"Failed: {name}")
+
+        # Uploads still being processed in the background set their own status
+        broken = Q(image__in=failed) | Q(image2__in=failed) | Q(image3__in=failed)
+        products = Product.objects.exclude(image_status='processing')
+        products.filter(broken).update(image_status='failed')
+        products.exclude(broken).exclude(image_status='ready').update(image_status='ready')
+
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {done} images ({len(failed)} failed)."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from marketplace import forecasting
+
+
+class Command(BaseCommand):
+    help = "Refresh product sales velocity and low-stock forecasts (run on a schedule, e.g. hourly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every product, not just stale ones")
+
+    def handle(self, *args, **options):
+        count = forecasting.refresh(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed forecasts for {count} products."))
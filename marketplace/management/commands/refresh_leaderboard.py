@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from marketplace import leaderboard
+
+
+class Command(BaseCommand):
+    help = "Recompute the seller leaderboard for every period (run daily to roll the 7d/30d windows)"
+
+    def handle(self, *args, **options):
+        leaderboard.refresh()
+        self.stdout.write(self.style.SUCCESS("Seller leaderboard refreshed."))
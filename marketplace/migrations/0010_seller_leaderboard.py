@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0009_report_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailycategorysales',
+            name='delivered_orders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailyproductsales',
+            name='delivered_orders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='dailysellersales',
+            name='delivered_orders',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SellerLeaderboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('7d', 'Last 7 days'), ('30d', 'Last 30 days'), ('all', 'All time')], max_length=5)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('orders', models.IntegerField(default=0)),
+                ('units', models.IntegerField(default=0)),
+                ('avg_rating', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+                ('rank', models.PositiveIntegerField(default=0)),
+                ('as_of', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leaderboard_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['period', 'rank'],
+                'indexes': [models.Index(fields=['period', 'rank'], name='marketplace_period_d30c65_idx')],
+                'unique_together': {('period', 'seller')},
+            },
+        ),
+    ]
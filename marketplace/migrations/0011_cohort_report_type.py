@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 20:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0010_seller_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='report',
+            name='report_type',
+            field=models.CharField(choices=[('sales', 'Sales Report'), ('products', 'Products Report'), ('orders', 'Orders Report'), ('revenue', 'Revenue Report'), ('users', 'Users Report'), ('inventory', 'Inventory Report'), ('cohorts', 'Cohort Retention Report')], max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='reportjob',
+            name='report_type',
+            field=models.CharField(choices=[('sales', 'Sales Report'), ('products', 'Products Report'), ('orders', 'Orders Report'), ('revenue', 'Revenue Report'), ('users', 'Users Report'), ('inventory', 'Inventory Report'), ('cohorts', 'Cohort Retention Report')], max_length=20),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:25
+
+import marketplace.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0013_admin_table_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('refs', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='image',
+            field=models.ImageField(blank=True, storage=marketplace.storage.media_storage, upload_to='categories/'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='image',
+            field=models.ImageField(storage=marketplace.storage.media_storage, upload_to='products/'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='image2',
+            field=models.ImageField(blank=True, null=True, storage=marketplace.storage.media_storage, upload_to='products/', verbose_name='Additional Image 1'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='image3',
+            field=models.ImageField(blank=True, null=True, storage=marketplace.storage.media_storage, upload_to='products/', verbose_name='Additional Image 2'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+import posixpath
+
+from django.conf import settings
+from django.db import migrations
+
+from marketplace.storage import media_storage
+
+IMAGE_FIELDS = ('image', 'image2', 'image3')
+
+
+def has_derivatives(name):
+    # The last derivative marketplace.images writes
+    root, _ = posixpath.splitext(name)
+    widest = max(getattr(settings, 'THUMBNAIL_WIDTHS', [320, 640, 960]))
+    return media_storage().exists(f'thumbs/{root}-{widest}w.jpg')
+
+
+def forwards(apps, schema_editor):
+    """Products added before image_status were marked ready; mark those without derivatives failed
+
+    The responsive_image tag then serves their original images until
+    rebuild_thumbnails generates the derivatives and marks them ready.
+    """
+    Product = apps.get_model('marketplace', 'Product')
+    rows = list(Product.objects.filter(image_status='ready').values_list('pk', *IMAGE_FIELDS))
+    names = {name for _, *images in rows for name in images if name}
+    missing = {name for name in names if not has_derivatives(name)}
+
+    broken = [pk for pk, *images in rows if missing.intersection(images)]
+    for start in range(0, len(broken), 500):
+        Product.objects.filter(pk__in=broken[start:start + 500]).update(image_status='failed')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0018_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, migrations.RunPython.noop),
+    ]
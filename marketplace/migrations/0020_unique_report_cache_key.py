@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+KEY = ('report_type', 'period', 'start_date', 'end_date', 'scope')
+
+
+def drop_duplicates(apps, schema_editor):
+    """Keep the most recently generated report of each cache key; the rest are cache copies"""
+    Report = apps.get_model('marketplace', 'Report')
+    seen = set()
+    duplicates = []
+    for pk, *key in Report.objects.order_by('-generated_at', '-pk').values_list('pk', *KEY):
+        if tuple(key) in seen:
+            duplicates.append(pk)
+        seen.add(tuple(key))
+    for start in range(0, len(duplicates), 500):
+        Report.objects.filter(pk__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('marketplace', '0019_backfill_image_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='report',
+            name='marketplace_report__eddc45_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='report',
+            constraint=models.UniqueConstraint(fields=('report_type', 'period', 'start_date', 'end_date', 'scope'), name='unique_report_cache_key'),
+        ),
+    ]
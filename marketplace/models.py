@@ -1,14 +1,19 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from django.contrib.auth.models import User
 
+from .storage import media_storage
+
 User = get_user_model()
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
-    image = models.ImageField(upload_to='categories/', blank=True)
+    image = models.ImageField(upload_to='categories/', storage=media_storage, blank=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subcategories')
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -16,6 +21,10 @@ class Category(models.Model):
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
+        indexes = [
+            # Top-level and sub-category menus
+            models.Index(fields=['parent'], condition=models.Q(is_active=True), name='category_active_parent_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -126,13 +135,33 @@ class Product(models.Model):
     # New field for specific animal types
     animal_type = models.CharField(max_length=20, blank=True, null=True)
     
-    image = models.ImageField(upload_to='products/')
-    image2 = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name='Additional Image 1')
-    image3 = models.ImageField(upload_to='products/', blank=True, null=True, verbose_name='Additional Image 2')
+    image = models.ImageField(upload_to='products/', storage=media_storage)
+    image2 = models.ImageField(upload_to='products/', storage=media_storage, blank=True, null=True, verbose_name='Additional Image 1')
+    image3 = models.ImageField(upload_to='products/', storage=media_storage, blank=True, null=True, verbose_name='Additional Image 2')
+    # Derivatives of new uploads are generated in the background (marketplace.images)
+    IMAGE_STATUSES = (
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    )
+    image_status = models.CharField(max_length=20, choices=IMAGE_STATUSES, default='ready')
+    image_placeholder = models.TextField(blank=True, editable=False)  # Tiny preview of image as a data: URI
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Matching the filters of the catalogue and seller views, see
+        # marketplace.tests.QueryPlanTests. is_active filters use partial
+        # indexes: SQLite tests the flag as a bare column, which can only be
+        # matched against an index condition, not an index column.
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['category', '-created_at'], condition=models.Q(is_active=True), name='product_active_category_idx'),
+            models.Index(fields=['seller', 'stock_quantity']),
+            models.Index(fields=['seller', '-created_at']),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -172,7 +201,7 @@ class Product(models.Model):
     def reduce_stock(self, quantity):
         if self.stock_quantity >= quantity:
             self.stock_quantity -= quantity
-            self.save()
+            self.save(update_fields=['stock_quantity', 'updated_at'])
             return True
         return False
 
@@ -226,6 +255,7 @@ class Report(models.Model):
         ('revenue', 'Revenue Report'),
         ('users', 'Users Report'),
         ('inventory', 'Inventory Report'),
+        ('cohorts', 'Cohort Retention Report'),
     )
     
     REPORT_PERIODS = (
@@ -245,8 +275,193 @@ class Report(models.Model):
     generated_at = models.DateTimeField(auto_now_add=True)
     data = models.JSONField()  # Store report data
     
+    # Cache key and bookkeeping (see marketplace.reports)
+    scope = models.CharField(max_length=50, default='platform')  # 'platform' or 'seller:<id>'
+    is_final = models.BooleanField(default=False)  # Range ended before the report was generated
+    last_accessed = models.DateTimeField(default=timezone.now)
+    
     class Meta:
         ordering = ['-generated_at']
+        constraints = [
+            # One stored report per cache key, also under concurrent misses
+            models.UniqueConstraint(
+                fields=['report_type', 'period', 'start_date', 'end_date', 'scope'],
+                name='unique_report_cache_key',
+            ),
+        ]
+        indexes = [models.Index(fields=['last_accessed'])]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} - {self.start_date} to {self.end_date}"
+
+class DailySellerSales(models.Model):
+    """Per-seller sales totals for one local day, maintained by marketplace.rollups"""
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_sales')
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    delivered_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    delivered_orders = models.IntegerField(default=0)
+    delivered_units = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Daily seller sales"
+        unique_together = ['seller', 'date']
+        indexes = [models.Index(fields=['date'])]
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.seller.username} - {self.date}"
+
+
+class DailyProductSales(models.Model):
+    """Per-product sales totals for one local day, maintained by marketplace.rollups"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='daily_sales')
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_product_sales')
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    delivered_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    delivered_orders = models.IntegerField(default=0)
+    delivered_units = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Daily product sales"
+        unique_together = ['product', 'date']
+        indexes = [models.Index(fields=['seller', 'date'])]
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.product.name} - {self.date}"
+
+
+class DailyCategorySales(models.Model):
+    """Per-category sales totals for one local day, maintained by marketplace.rollups"""
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='daily_sales')
+    date = models.DateField()
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    delivered_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    delivered_orders = models.IntegerField(default=0)
+    delivered_units = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Daily category sales"
+        unique_together = ['category', 'date']
+        indexes = [models.Index(fields=['date'])]
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.category.name} - {self.date}"
+
+
+class ReportJob(models.Model):
+    """Background generation of an admin report, see marketplace.jobs"""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    ACTIVE_STATUSES = ('pending', 'running')
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    key = models.CharField(max_length=200)  # Identical requests share a key
+    report_type = models.CharField(max_length=20, choices=Report.REPORT_TYPES)
+    period = models.CharField(max_length=20, choices=Report.REPORT_PERIODS)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    progress = models.PositiveSmallIntegerField(default=0)
+    data = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # At most one in-flight job per distinct report
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status__in=['pending', 'running']),
+                name='unique_active_report_job',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_type_display()} job ({self.status}, {self.progress}%)"
+
+
+class SellerLeaderboard(models.Model):
+    """Ranked delivered-sales totals per seller and period, maintained by marketplace.leaderboard"""
+    PERIOD_CHOICES = (
+        ('7d', 'Last 7 days'),
+        ('30d', 'Last 30 days'),
+        ('all', 'All time'),
+    )
+
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='leaderboard_entries')
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    avg_rating = models.DecimalField(max_digits=3, decimal_places=2, null=True, blank=True)
+    rank = models.PositiveIntegerField(default=0)
+    as_of = models.DateField()  # Local date the period window ends on
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['period', 'seller']
+        indexes = [models.Index(fields=['period', 'rank'])]
+        ordering = ['period', 'rank']
+
+    def __str__(self):
+        return f"#{self.rank} {self.seller.username} ({self.period})"
+
+
+class ProductForecast(models.Model):
+    """Smoothed sales velocity and stock cover per product, maintained by marketplace.forecasting"""
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, related_name='forecast')
+    velocity = models.FloatField(default=0)  # Units sold per day
+    days_of_stock = models.FloatField(null=True, blank=True)  # None when the product is not selling
+    reorder_point = models.PositiveIntegerField(default=0)
+    low_stock_notified = models.BooleanField(default=False)
+    as_of = models.DateField()  # Last complete local day included in velocity
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.product.name}: {self.velocity:.2f}/day"
+
+
+class MediaBlob(models.Model):
+    """A content-addressed image file and the number of image fields pointing at it"""
+    name = models.CharField(max_length=255, unique=True)
+    refs = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refs} refs)"
+
+
+class ChunkedUpload(models.Model):
+    """A resumable image upload in progress, see marketplace.uploads"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chunked_uploads')
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)  # Bytes received so far
+    sha256 = models.CharField(max_length=64, blank=True)  # Of the whole file
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"{self.get_report_type_display()} - {self.start_date} to {self.end_date}"
\ No newline at end of file
+        return f"{self.filename} ({self.offset}/{self.size} bytes)"
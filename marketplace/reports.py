@@ -0,0 +1,272 @@
+"""Report generation and the persisted report cache.
+
+Generated reports are stored in the Report model keyed by (report_type,
+period, start_date, end_date, scope). A report whose range ended before today
+is final and is served straight from storage on later requests; ranges that
+include today are recomputed on every request. Rollup refreshes invalidate
+the stored reports covering the refreshed days, and old entries are evicted
+on an age and size budget (REPORT_CACHE_MAX_AGE_DAYS, REPORT_CACHE_MAX_ENTRIES).
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from livestockhub import replicas
+from orders.models import Order
+from . import timeseries
+from .models import DailySellerSales, DailyProductSales, Report
+
+PLATFORM_SCOPE = 'platform'
+
+# last_accessed only orders eviction, so a hit records it at most this often;
+# other hits stay read-only and do not pin the client to the primary
+ACCESS_RESOLUTION = timedelta(hours=1)
+
+
+def max_entries():
+    return getattr(settings, 'REPORT_CACHE_MAX_ENTRIES', 1000)
+
+
+def max_age():
+    return timedelta(days=getattr(settings, 'REPORT_CACHE_MAX_AGE_DAYS', 90))
+
+
+def seller_scope(seller):
+    return f'seller:{seller.pk}'
+
+
+def normalize_period(period):
+    return period if period in dict(Report.REPORT_PERIODS) else 'custom'
+
+
+# Report builders
+
+def comparison_ranges(start_date, end_date):
+    """The requested range and the ranges it is compared against, keyed by name
+
+    'previous' is the equally long range just before it and 'last_year' the
+    same dates one year earlier (29 February maps to the 28th).
+    """
+    length = end_date - start_date + timedelta(days=1)
+    return {
+        'current': (start_date, end_date),
+        'previous': (start_date - length, start_date - timedelta(days=1)),
+        'last_year': (_year_earlier(start_date), _year_earlier(end_date)),
+    }
+
+
+def _year_earlier(day):
+    try:
+        return day.replace(year=day.year - 1)
+    except ValueError:
+        return day.replace(year=day.year - 1, day=28)
+
+
+def _in_range(start_date, end_date):
+    return Q(date__range=[start_date, end_date])
+
+
+def _change(current, previous):
+    """Percentage change, or None when there is nothing to compare against"""
+    if not previous:
+        return None
+    return round(float((current - previous) / previous * 100), 1)
+
+
+def build_sales_report(seller, report_type, period, start_date, end_date):
+    """Sales summary for one seller with comparisons, read from the daily rollups
+
+    Every range in comparison_ranges() is aggregated in the same query using
+    conditional aggregation, once for the totals and once per product.
+    """
+    granularity = timeseries.resolve_granularity(period, start_date, end_date)
+    ranges = comparison_ranges(start_date, end_date)
+    earliest = min(start for start, _ in ranges.values())
+
+    totals = DailySellerSales.objects.filter(
+        seller=seller,
+        date__range=[earliest, end_date]
+    ).aggregate(**{
+        f'{name}_{measure}': Coalesce(Sum(measure, filter=_in_range(*dates)), default)
+        for name, dates in ranges.items()
+        for measure, default in (('orders', 0), ('revenue', Decimal('0.00')))
+    })
+
+    products = DailyProductSales.objects.filter(
+        seller=seller,
+        date__range=[earliest, end_date]
+    ).values('product__name').annotate(**{
+        f'{name}_{measure}': Coalesce(Sum(measure, filter=_in_range(*dates)), default)
+        for name, dates in ranges.items()
+        for measure, default in (('units', 0), ('revenue', Decimal('0.00')))
+    }).filter(current_units__gt=0).order_by('-current_units', '-current_revenue')[:5]
+
+    summaries = {}
+    for name, (range_start, range_end) in ranges.items():
+        orders = totals[f'{name}_orders']
+        revenue = totals[f'{name}_revenue']
+        summaries[name] = {
+            'start_date': range_start.isoformat(),
+            'end_date': range_end.isoformat(),
+            'total_sales': orders,
+            'total_revenue': float(revenue),
+            'average_order_value': float(revenue / orders) if orders > 0 else 0,
+        }
+
+    current = summaries.pop('current')
+    for name, summary in summaries.items():
+        summary['revenue_change'] = _change(totals['current_revenue'], totals[f'{name}_revenue'])
+        summary['sales_change'] = _change(totals['current_orders'], totals[f'{name}_orders'])
+
+    return {
+        'total_sales': current['total_sales'],
+        'total_revenue': current['total_revenue'],
+        'average_order_value': current['average_order_value'],
+        'comparisons': summaries,
+        'top_products': [
+            {
+                'product__name': product['product__name'],
+                'total_sold': product['current_units'],
+                'total_revenue': float(product['current_revenue']),
+                **{
+                    f'{name}_units': product[f'{name}_units'] for name in summaries
+                },
+                **{
+                    f'{name}_revenue': float(product[f'{name}_revenue']) for name in summaries
+                },
+            }
+            for product in products
+        ],
+        'granularity': granularity,
+        'series': timeseries.as_json(
+            timeseries.seller_sales(seller, granularity, start_date, end_date)
+        ),
+    }
+
+
+def build_admin_report(report_type, period, start_date, end_date, progress=None):
+    """Platform-wide report for admins
+
+    progress, if given, is called with a completion percentage between steps.
+    """
+    progress = progress or (lambda percent: None)
+    granularity = timeseries.resolve_granularity(period, start_date, end_date)
+
+    if report_type == 'revenue':
+        total_revenue = DailySellerSales.objects.filter(
+            date__range=[start_date, end_date]
+        ).aggregate(total=Sum('revenue'))['total'] or 0
+        progress(30)
+        # Orders spanning several sellers appear in each seller's rollup, so count them directly
+        total_orders = Order.objects.filter(
+            created_at__date__range=[start_date, end_date]
+        ).exclude(status='cancelled').count()
+        progress(60)
+
+        return {
+            'total_revenue': float(total_revenue),
+            'total_orders': total_orders,
+            'average_order_value': float(total_revenue / total_orders) if total_orders > 0 else 0,
+            'granularity': granularity,
+            'series': timeseries.as_json(
+                timeseries.platform_sales(granularity, start_date, end_date)
+            ),
+        }
+
+    if report_type == 'users':
+        User = get_user_model()
+        signups = timeseries.series(
+            User.objects.all(), 'date_joined', granularity, start_date, end_date,
+            new_users=Count('id')
+        )
+        return {
+            'new_users': sum(point['new_users'] for point in signups),
+            'granularity': granularity,
+            'series': timeseries.as_json(signups),
+        }
+
+    if report_type == 'cohorts':
+        from .cohorts import build_cohort_report
+        return build_cohort_report(start_date, end_date, progress=progress)
+
+    return {}
+
+
+# Persisted cache
+
+def get_or_generate(report_type, period, start_date, end_date, scope, user, build):
+    """Return stored report data for the key, generating and storing it if needed
+
+    build() is only called on a miss or when the range includes today.
+    Stored reports are looked up, and final ones built, on the primary: a
+    lagging replica would miss every stored report and could hand back
+    rollups from before the latest invalidate(), kept forever as final.
+    """
+    period = normalize_period(period)
+    now = timezone.now()
+    key = {
+        'report_type': report_type,
+        'period': period,
+        'start_date': start_date,
+        'end_date': end_date,
+        'scope': scope,
+    }
+
+    with replicas.primary():
+        report = Report.objects.filter(**key).first()
+    if report is not None and report.is_final:
+        if report.last_accessed < now - ACCESS_RESOLUTION:
+            Report.objects.filter(pk=report.pk).update(last_accessed=now)
+        return report.data
+
+    is_final = end_date < timezone.localdate()
+    if is_final:
+        with replicas.primary():
+            data = build()
+    else:
+        data = build()  # Rebuilt on every request, so replica lag does not stick
+
+    # Concurrent misses of one key both land here; the unique key keeps one row
+    _, created = Report.objects.update_or_create(
+        defaults={'data': data, 'is_final': is_final, 'last_accessed': now},
+        create_defaults={'data': data, 'is_final': is_final, 'last_accessed': now, 'generated_by': user},
+        **key,
+    )
+    if created:
+        evict()
+    return data
+
+
+def invalidate(start_date, end_date):
+    """Drop stored reports whose range, or a range they compare against, overlaps the given local dates"""
+    deleted = Report.objects.filter(start_date__lte=end_date, end_date__gte=start_date).delete()[0]
+
+    # Seller reports also read their comparison ranges, which lie before the report's own range
+    compared = [
+        pk for pk, report_start, report_end in Report.objects.filter(
+            scope__startswith='seller:', end_date__gte=start_date
+        ).values_list('pk', 'start_date', 'end_date')
+        if any(
+            range_start <= end_date and range_end >= start_date
+            for range_start, range_end in comparison_ranges(report_start, report_end).values()
+        )
+    ]
+    if compared:
+        deleted += Report.objects.filter(pk__in=compared).delete()[0]
+    return deleted
+
+
+def evict():
+    """Enforce the report cache age and size budget"""
+    deleted = Report.objects.filter(last_accessed__lt=timezone.now() - max_age()).delete()[0]
+
+    overflow = Report.objects.order_by('-last_accessed').values_list('pk', flat=True)[max_entries():]
+    overflow_ids = list(overflow)
+    if overflow_ids:
+        deleted += Report.objects.filter(pk__in=overflow_ids).delete()[0]
+    return deleted
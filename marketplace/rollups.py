@@ -0,0 +1,237 @@
+"""Daily sales rollups backing the seller and admin reports.
+
+Each rollup row holds the totals of one seller, product or category for one
+local (TIME_ZONE) day. Rows are recomputed from the underlying order items for
+just the affected days and keys whenever an order or order item changes, so the
+report views only ever read a handful of pre-aggregated rows.
+"""
+import threading
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from orders.models import OrderItem
+from . import leaderboard
+from .models import DailySellerSales, DailyProductSales, DailyCategorySales
+
+LINE_TOTAL = ExpressionWrapper(
+    F('quantity') * F('price'),
+    output_field=DecimalField(max_digits=14, decimal_places=2)
+)
+
+# Cancelled lines never count as sales; delivered lines also feed the delivered_* columns
+CANCELLED = Q(status='cancelled') | Q(order__status='cancelled')
+DELIVERED = Q(status='delivered') | Q(order__status='delivered')
+
+# (rollup model, rollup key field, order item lookup for that key)
+ROLLUPS = (
+    (DailySellerSales, 'seller_id', 'product__seller'),
+    (DailyProductSales, 'product_id', 'product'),
+    (DailyCategorySales, 'category_id', 'product__category'),
+)
+
+BATCH_SIZE = 500
+
+_pending = threading.local()
+
+
+def local_date(value):
+    """Return the local calendar date of an aware datetime"""
+    return timezone.localtime(value).date()
+
+
+def day_bounds(day):
+    """Return the aware [start, end) datetimes of a local calendar day"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def sales_items():
+    """Order items that count as sales"""
+    return OrderItem.objects.exclude(CANCELLED).order_by()
+
+
+def _totals(items, *group_by):
+    return items.values(*group_by).annotate(
+        revenue=Coalesce(Sum(LINE_TOTAL), Decimal('0.00')),
+        orders=Count('order', distinct=True),
+        units=Coalesce(Sum('quantity'), 0),
+        delivered_revenue=Coalesce(Sum(LINE_TOTAL, filter=DELIVERED), Decimal('0.00')),
+        delivered_orders=Count('order', distinct=True, filter=DELIVERED),
+        delivered_units=Coalesce(Sum('quantity', filter=DELIVERED), 0),
+    )
+
+
+def _defaults(row):
+    return {
+        'revenue': row['revenue'],
+        'orders': row['orders'],
+        'units': row['units'],
+        'delivered_revenue': row['delivered_revenue'],
+        'delivered_orders': row['delivered_orders'],
+        'delivered_units': row['delivered_units'],
+    }
+
+
+def _extra_fields(model, row):
+    """Denormalised columns carried by some rollups"""
+    if model is DailyProductSales:
+        return {'seller_id': row['product__seller']}
+    return {}
+
+
+def _delivered(row):
+    return (row['delivered_revenue'], row['delivered_orders'], row['delivered_units'])
+
+
+def refresh_day(day, seller_ids=(), product_ids=(), category_ids=()):
+    """Recompute the rollup rows of the given keys for one local day
+
+    Returns the ids of the sellers whose delivered totals changed, the only
+    ones the leaderboard has to follow.
+    """
+    start, end = day_bounds(day)
+    items = sales_items().filter(order__created_at__gte=start, order__created_at__lt=end)
+    delivered_changed = set()
+
+    for (model, key, lookup), ids in zip(ROLLUPS, (seller_ids, product_ids, category_ids)):
+        ids = {pk for pk in ids if pk is not None}
+        if not ids:
+            continue
+
+        group_by = [lookup, 'product__seller'] if model is DailyProductSales else [lookup]
+        rows = {
+            row[lookup]: row
+            for row in _totals(items.filter(**{f'{lookup}__in': ids}), *group_by)
+        }
+
+        if model is DailySellerSales:
+            before = {
+                row['seller_id']: _delivered(row)
+                for row in model.objects.filter(date=day, seller_id__in=ids).values(
+                    'seller_id', 'delivered_revenue', 'delivered_orders', 'delivered_units'
+                )
+            }
+            delivered_changed = {
+                pk for pk in ids
+                if before.get(pk, (0, 0, 0)) != (_delivered(rows[pk]) if pk in rows else (0, 0, 0))
+            }
+
+        stale = ids - rows.keys()
+        if stale:
+            model.objects.filter(date=day, **{f'{key}__in': stale}).delete()
+
+        for pk, row in rows.items():
+            defaults = _defaults(row)
+            defaults.update(_extra_fields(model, row))
+            model.objects.update_or_create(date=day, defaults=defaults, **{key: pk})
+
+    return delivered_changed
+
+
+def schedule(day, seller_id=None, product_id=None, category_id=None):
+    """Mark keys dirty for a day and refresh them once the transaction commits
+
+    Keys touched several times in one transaction (e.g. every item of a new
+    order) are refreshed only once.
+    """
+    pending = getattr(_pending, 'days', None)
+    if pending is None:
+        pending = _pending.days = {}
+
+    sellers, products, categories = pending.setdefault(day, (set(), set(), set()))
+    sellers.add(seller_id)
+    products.add(product_id)
+    categories.add(category_id)
+
+    transaction.on_commit(flush)
+
+
+def flush():
+    """Refresh every day marked dirty by schedule()"""
+    pending = getattr(_pending, 'days', None)
+    if not pending:
+        return
+    _pending.days = {}
+
+    # Only delivered sales count on the leaderboard, so e.g. a checkout
+    # leaves it alone; ranks are recomputed in a batch when it is next read
+    delivered_changed = set()
+    for day, (sellers, products, categories) in pending.items():
+        delivered_changed |= refresh_day(day, sellers, products, categories)
+
+    leaderboard.refresh(seller_ids=delivered_changed, rank=False)
+
+    # Stored reports covering these days are now stale
+    from .reports import invalidate
+    invalidate(min(pending), max(pending))
+
+
+def schedule_item(item):
+    """Mark the rollups an order item contributes to as dirty"""
+    product = item.product
+    schedule(
+        local_date(item.order.created_at),
+        seller_id=product.seller_id,
+        product_id=product.id,
+        category_id=product.category_id,
+    )
+
+
+def refresh_orders(order_ids):
+    """Mark the rollups of whole orders as dirty
+
+    Use this after queryset.update() on orders or items, which bypasses the
+    post_save signals that normally keep the rollups current.
+    """
+    rows = OrderItem.objects.filter(order_id__in=order_ids).values_list(
+        'order__created_at', 'product__seller_id', 'product_id', 'product__category_id'
+    ).order_by()
+    for created_at, seller_id, product_id, category_id in rows:
+        schedule(local_date(created_at), seller_id, product_id, category_id)
+
+
+def rebuild(start=None, end=None):
+    """Rebuild all rollup rows between two local dates (inclusive), or everything
+
+    Used by the rebuild_rollups command to backfill history. Returns the number
+    of rows written per rollup model.
+    """
+    items = sales_items()
+    if start:
+        items = items.filter(order__created_at__gte=day_bounds(start)[0])
+    if end:
+        items = items.filter(order__created_at__lt=day_bounds(end)[1])
+    items = items.annotate(day=TruncDate('order__created_at'))
+
+    written = {}
+    with transaction.atomic():
+        for model, key, lookup in ROLLUPS:
+            existing = model.objects.all()
+            if start:
+                existing = existing.filter(date__gte=start)
+            if end:
+                existing = existing.filter(date__lte=end)
+            existing.delete()
+
+            group_by = ['day', lookup, 'product__seller'] if model is DailyProductSales else ['day', lookup]
+            batch = []
+            count = 0
+            for row in _totals(items, *group_by).iterator():
+                fields = _defaults(row)
+                fields.update(_extra_fields(model, row))
+                batch.append(model(date=row['day'], **{key: row[lookup]}, **fields))
+                if len(batch) >= BATCH_SIZE:
+                    model.objects.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                model.objects.bulk_create(batch)
+                count += len(batch)
+            written[model.__name__] = count
+    return written
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from accounts.models import SellerProfile
+from livestockhub import database
+from orders.models import Order, OrderItem
+from . import images, kpis, rollups
+from .models import Category, Product, SellerLeaderboard
+
+# synchronous=NORMAL only where the database file is in WAL mode
+connection_created.connect(database.tune_wal, dispatch_uid='sqlite_tune_wal')
+
+
+@receiver(post_save, sender=OrderItem, dispatch_uid='rollups_item_saved')
+@receiver(post_delete, sender=OrderItem, dispatch_uid='rollups_item_deleted')
+def order_item_changed(sender, instance, **kwargs):
+    """Keep the daily sales rollups in step with order items"""
+    rollups.schedule_item(instance)
+
+
+@receiver(post_save, sender=Order, dispatch_uid='rollups_order_saved')
+def order_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Order status drives cancelled/delivered totals for all of its items"""
+    if created:
+        return  # Items are added afterwards and trigger their own refresh
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    rollups.refresh_orders([instance.pk])
+
+
+@receiver(post_save, sender=SellerProfile, dispatch_uid='leaderboard_rating_saved')
+def seller_rating_changed(sender, instance, **kwargs):
+    """Leaderboard rows carry a copy of the seller's rating"""
+    SellerLeaderboard.objects.filter(seller_id=instance.user_id).update(avg_rating=instance.rating)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL, dispatch_uid='kpis_user_saved')
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL, dispatch_uid='kpis_user_deleted')
+@receiver(post_save, sender=Product, dispatch_uid='kpis_product_saved')
+@receiver(post_delete, sender=Product, dispatch_uid='kpis_product_deleted')
+@receiver(post_save, sender=Order, dispatch_uid='kpis_order_saved')
+@receiver(post_delete, sender=Order, dispatch_uid='kpis_order_deleted')
+def platform_counts_changed(sender, created=False, update_fields=None, **kwargs):
+    """Drop the cached admin KPI snapshot once a change to what it counts is committed
+
+    Saves of other fields only, such as last_login on every login or stock
+    on every checkout, keep it; the snapshot TTL covers those counters.
+    """
+    if kwargs['signal'] is post_save and not created and update_fields is not None:
+        if not set(update_fields) & kpis.COUNTED_FIELDS[sender._meta.label]:
+            return
+    transaction.on_commit(kpis.invalidate)
+
+
+@receiver(post_init, sender=Product, dispatch_uid='images_product_loaded')
+@receiver(post_init, sender=Category, dispatch_uid='images_category_loaded')
+def remember_images(sender, instance, **kwargs):
+    instance._image_names = images.loaded_names(instance)
+
+
+@receiver(post_save, sender=Product, dispatch_uid='images_product_refs')
+@receiver(post_save, sender=Category, dispatch_uid='images_category_refs')
+def image_references_changed(sender, instance, created, **kwargs):
+    """Move image references from the names the instance was loaded with to the saved ones
+
+    New images also get their derivatives and placeholder generated in the background.
+    """
+    before = {} if created else getattr(instance, '_image_names', {})
+    after = images.loaded_names(instance)
+    changed = [field for field in after if (created or field in before) and before.get(field, '') != after[field]]
+    if changed:
+        images.release([before.get(field, '') for field in changed])
+        images.acquire([after[field] for field in changed])
+        images.schedule(instance, {field: after[field] for field in changed})
+    instance._image_names = after
+
+
+@receiver(post_delete, sender=Product, dispatch_uid='images_product_deleted')
+@receiver(post_delete, sender=Category, dispatch_uid='images_category_deleted')
+def images_released(sender, instance, **kwargs):
+    images.release(images.loaded_names(instance).values())
@@ -0,0 +1,54 @@
+"""Content-addressed storage for uploaded images.
+
+Files are named by the SHA-256 of their content inside the upload directory,
+e.g. products/3f/3fa9...c1.jpg, so uploading the same photo again reuses
+the stored file instead of writing products/jersey_HrKoy2i.jpg. A name never
+changes content, which also makes the files safe to cache forever.
+
+Several products can share one file, so files are only deleted when the last
+reference goes; MediaBlob counts the references (see marketplace.images).
+"""
+import hashlib
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def hashed_name(name, digest):
+    """upload_dir/ab/abcdef....ext for a file name and content digest"""
+    directory, filename = posixpath.split(name)
+    extension = posixpath.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest[:2], digest + extension)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        name = hashed_name(name, content_hash(content))
+        if self.exists(name):
+            return name  # Same bytes are already stored
+        # A concurrent identical upload may win the race, in which case the
+        # default get_available_name() suffix applies and the copy is not shared
+        return super().save(name, content, max_length)
+
+    def save_named(self, name, content, max_length=None):
+        """Save under name as given, for files whose names are derived from a stored file (e.g. thumbnails)"""
+        return super().save(name, content, max_length)
+
+
+content_addressed = ContentAddressedStorage()
+
+
+def media_storage():
+    """Storage for the image fields (a callable so migrations do not serialise the instance)"""
+    return content_addressed
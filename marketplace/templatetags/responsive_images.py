@@ -0,0 +1,64 @@
+# marketplace/templatetags/responsive_images.py
+from urllib.parse import quote
+
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from marketplace import images
+
+register = template.Library()
+
+# Shown while a new upload's derivatives are being generated
+PROCESSING_PLACEHOLDER = 'data:image/svg+xml,' + quote(
+    '<svg xmlns="http://www.w3.org/2000/svg" width="320" height="240" viewBox="0 0 320 240">'
+    '<rect width="320" height="240" fill="#e9ecef"/>'
+    '<text x="160" y="125" font-family="sans-serif" font-size="16" fill="#6c757d" text-anchor="middle">'
+    'Processing photo\u2026</text></svg>'
+)
+
+
+@register.filter
+def srcset(image, extension='webp'):
+    """srcset value listing an image's derivatives, e.g. {{ product.image|srcset:"jpg" }}"""
+    if not image:
+        return ''
+    return images.srcset(image.name, extension)
+
+
+@register.simple_tag
+def responsive_image(image, sizes='100vw', **attrs):
+    """<picture> with WebP and JPEG derivatives of an image field, lazily loaded
+
+    sizes is the rendered width (e.g. "60px" or "(max-width: 768px) 100vw, 25vw")
+    so the browser fetches the smallest sufficient derivative. Extra keyword
+    arguments (alt, class, style, ...) become attributes of the <img>.
+
+    Products carry an image_status: while it is "processing" a placeholder
+    is shown, and images whose derivatives failed fall back to the original.
+    Other models are checked in storage. A product's main image also gets
+    its stored preview as background, painted until the image arrives.
+    """
+    if not image:
+        return ''
+    preview = getattr(image.instance, 'image_placeholder', '') if image.field.name == 'image' else ''
+    if preview:
+        style = attrs.get('style', '').rstrip().rstrip(';')
+        attrs['style'] = f"{style}; background: center / cover no-repeat url('{preview}');".lstrip('; ')
+    attributes = format_html_join(' ', '{}="{}"', sorted(attrs.items()))
+    name = image.name
+    status = getattr(image.instance, 'image_status', None)
+    if status != 'ready' and not images.has_derivatives(name):
+        if status == 'processing':
+            return format_html('<img src="{}" {}>', preview or PROCESSING_PLACEHOLDER, attributes)
+        return format_html('<img src="{}" loading="lazy" {}>', image.url, attributes)
+
+    return format_html(
+        '<picture style="display: contents;">'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" loading="lazy" decoding="async" {}>'
+        '</picture>',
+        images.srcset(name, 'webp'), sizes,
+        images.url(name, images.widths()[0], 'jpg'),
+        images.srcset(name, 'jpg'), sizes,
+        attributes,
+    )
@@ -1,3 +1,397 @@
-from django.test import TestCase
+import re
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.db import OperationalError, connection, connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+
+from accounts.models import User
+from orders.models import Order, OrderItem
+from dashboard import actions
+from livestockhub import ratelimit, replicas
+from . import rollups
+from .models import Cart, CartItem, Category, Product
+
+FULL_SCAN = re.compile(r'\bSCAN (?!CONSTANT ROW)\S+$')
+
+
+@skipUnlessDBFeature('supports_explaining_query_execution')
+class QueryPlanTests(TestCase):
+    """The hot catalogue, seller and order queries must be answered from an index, never a full table scan"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user('seller', 'seller@example.com', 'pw', user_type='seller')
+        cls.customer = User.objects.create_user('customer', 'customer@example.com', 'pw')
+        cls.parent = Category.objects.create(name='Livestock')
+        cls.category = Category.objects.create(name='Cattle', parent=cls.parent)
+        cls.product = Product.objects.create(
+            seller=cls.seller, category=cls.category, name='Cow', description='Dairy cow',
+            price=Decimal('100.00'), stock_quantity=5, livestock_type='cattle', image='products/cow.jpg',
+        )
+        cls.order = Order.objects.create(
+            customer=cls.customer, total_amount=Decimal('100.00'),
+            shipping_address='KG 1 Ave', shipping_city='Kigali', shipping_phone='0788000000',
+        )
+        OrderItem.objects.create(order=cls.order, product=cls.product, quantity=1, price=Decimal('100.00'))
+
+    def assertUsesIndexes(self, queryset, sorted_by_index=False, index=None):
+        """Fail on any full table scan in the plan (and, if sorted_by_index, on a sort step or if index, when it is unused)"""
+        if connection.vendor != 'sqlite':
+            self.skipTest("Plans are checked against SQLite's EXPLAIN QUERY PLAN output")
+        plan = queryset.explain()
+        scans = [line for line in plan.splitlines() if FULL_SCAN.search(line.strip())]
+        self.assertEqual(scans, [], f"Full table scan in:\n{queryset.query}\n{plan}")
+        if sorted_by_index:
+            self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, f"Sorted without an index:\n{queryset.query}\n{plan}")
+        if index:
+            self.assertIn(index, plan, f"{index} unused:\n{queryset.query}\n{plan}")
+
+    # Catalogue (home, product_list, product_detail, category_products)
+
+    def test_active_products(self):
+        self.assertUsesIndexes(Product.objects.filter(is_active=True)[:8])
+
+    def test_active_products_in_categories(self):
+        self.assertUsesIndexes(
+            Product.objects.filter(category__in=[self.parent, self.category], is_active=True),
+            index='product_active_category_idx',
+        )
+
+    def test_related_products(self):
+        self.assertUsesIndexes(
+            Product.objects.filter(category=self.category, is_active=True).exclude(id=self.product.id)[:4],
+            index='product_active_category_idx',
+        )
+
+    def test_top_level_categories(self):
+        self.assertUsesIndexes(
+            Category.objects.filter(parent__isnull=True, is_active=True).order_by(), index='category_active_parent_idx'
+        )
+
+    def test_subcategories(self):
+        self.assertUsesIndexes(self.parent.subcategories.filter(is_active=True).order_by())
+
+    # Seller dashboard and product management
+
+    def test_seller_active_products(self):
+        self.assertUsesIndexes(Product.objects.filter(seller=self.seller, is_active=True))
+
+    def test_seller_out_of_stock(self):
+        self.assertUsesIndexes(Product.objects.filter(seller=self.seller, stock_quantity=0))
+
+    def test_seller_recent_products(self):
+        self.assertUsesIndexes(Product.objects.filter(seller=self.seller).order_by('-created_at')[:5], sorted_by_index=True)
+
+    def test_seller_orders(self):
+        self.assertUsesIndexes(Order.objects.filter(items__product__seller=self.seller).distinct().order_by('-created_at'))
+
+    def test_seller_delivered_sales(self):
+        self.assertUsesIndexes(OrderItem.objects.filter(product__seller=self.seller, order__status='delivered'))
+
+    def test_product_has_orders(self):
+        self.assertUsesIndexes(OrderItem.objects.filter(product=self.product))
+
+    # Orders
+
+    def test_customer_order_history(self):
+        self.assertUsesIndexes(Order.objects.filter(customer=self.customer).order_by('-created_at')[:5], sorted_by_index=True)
+
+    def test_orders_by_status(self):
+        self.assertUsesIndexes(Order.objects.filter(status='pending').order_by('-created_at'), sorted_by_index=True)
+
+
+@override_settings(
+    RATE_LIMIT_CACHE='ratelimit',
+    RATE_LIMIT_SHED_IN_FLIGHT=4,
+    RATE_LIMIT_SHED_QUEUE_MS=500,
+    RATE_LIMITS={'marketplace:search_categories': {'rate': 2, 'burst': 3, 'priority': 'low'}},
+)
+class RateLimitTests(TestCase):
+    """Limited routes take tokens per IP and per session and refuse a request before it reaches a view"""
+
+    url = reverse('marketplace:search_categories')
+
+    def setUp(self):
+        caches['ratelimit'].clear()
+        self.now = 1_000_000.0
+        clock = mock.patch.object(ratelimit.time, 'time', side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def get(self, ip='10.0.0.1', **extra):
+        return self.client.get(self.url, REMOTE_ADDR=ip, **extra)
+
+    def test_burst(self):
+        for _ in range(3):
+            self.assertEqual(self.get().status_code, 200)
+        response = self.get()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.get('10.0.0.2').status_code, 200)  # Other clients have their own bucket
+
+    def test_refill(self):
+        for _ in range(3):
+            self.get()
+        self.assertEqual(self.get().status_code, 429)
+        self.now += 0.5  # One token at 2 a second
+        self.assertEqual(self.get().status_code, 200)
+        self.assertEqual(self.get().status_code, 429)
+        self.now += 60  # Never more than the burst
+        for _ in range(3):
+            self.assertEqual(self.get().status_code, 200)
+        self.assertEqual(self.get().status_code, 429)
+
+    def test_retry_after(self):
+        with override_settings(RATE_LIMITS={'marketplace:search_categories': {'rate': 0.1, 'burst': 1}}):
+            self.get()
+            response = self.get()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '10')
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_session_bucket(self):
+        self.client.force_login(User.objects.create_user('customer', 'customer@example.com', 'pw'))
+        for ip in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+            self.assertEqual(self.get(ip).status_code, 200)
+        with self.assertNumQueries(0):  # Refused off the cookie, without loading the session
+            self.assertEqual(self.get('10.0.0.4').status_code, 429)
+
+    def test_methods(self):
+        with override_settings(RATE_LIMITS={'marketplace:search_categories': {'rate': 2, 'burst': 1, 'methods': ['POST']}}):
+            for _ in range(3):
+                self.assertEqual(self.get().status_code, 200)
+
+    def test_sheds_low_priority_when_busy(self):
+        with mock.patch.object(ratelimit.RateLimitMiddleware, 'in_flight', 4):
+            response = self.get()  # The 5th request in flight
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(ratelimit.RateLimitMiddleware.in_flight, 0)
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_sheds_low_priority_after_queueing(self):
+        self.assertEqual(self.get(HTTP_X_REQUEST_START=f't={self.now - 1:.3f}').status_code, 429)
+        self.assertEqual(self.get(HTTP_X_REQUEST_START=f't={int((self.now - 0.1) * 1e6)}').status_code, 200)
+
+
+class ReplicaRouterTests(TransactionTestCase):
+    """Reads allowed on the replica go there unless the client or request wrote, or the replica is down
+
+    Outside a DATABASE_REPLICA_URL setup the replica alias is added here, once
+    the test database exists (the runner only sets up aliases in settings),
+    as a TEST MIRROR of it. This is a TransactionTestCase because inside a
+    transaction every read stays on the primary.
+    """
+
+    databases = {'default', replicas.REPLICA} if replicas.configured() else {'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.added_replica = not replicas.configured()
+        if cls.added_replica:
+            default = connections['default'].settings_dict
+            settings.DATABASES[replicas.REPLICA] = dict(default, TEST=dict(default['TEST'], MIRROR='default'))
+            cls.databases = {'default', replicas.REPLICA}
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.added_replica:
+            cls.databases = {'default'}
+            connections[replicas.REPLICA].close()
+            del connections[replicas.REPLICA]
+            del settings.DATABASES[replicas.REPLICA]
+        super().tearDownClass()
+
+    def setUp(self):
+        replicas._down_until = 0.0
+        Category.objects.create(name='Cattle')
+
+    def request(self, view, **cookies):
+        request = RequestFactory().get('/')
+        request.COOKIES.update(cookies)
+        return replicas.ReplicaMiddleware(replicas.read_only(view))(request)
+
+    def assertReadsFrom(self, alias):
+        with self.assertNumQueries(1, using=alias):
+            self.assertEqual(Category.objects.count(), 1)
+
+    def test_reads_go_to_the_replica(self):
+        with replicas.reads():
+            self.assertReadsFrom(replicas.REPLICA)
+            with replicas.primary():
+                self.assertReadsFrom('default')
+            with transaction.atomic():
+                self.assertReadsFrom('default')
+        self.assertReadsFrom('default')
+
+    def test_write_pins_the_request(self):
+        def view(request):
+            self.assertReadsFrom(replicas.REPLICA)
+            Category.objects.filter(name='Cattle').update(description='Cows')
+            self.assertReadsFrom('default')
+            return HttpResponse()
+
+        response = self.request(view)
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        self.assertEqual(response.cookies[replicas.PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+    def test_reads_alone_do_not_pin(self):
+        def view(request):
+            self.assertReadsFrom(replicas.REPLICA)
+            return HttpResponse()
+
+        self.assertNotIn(replicas.PIN_COOKIE, self.request(view).cookies)
+
+    def test_pin_cookie_keeps_the_client_on_the_primary(self):
+        def view(request):
+            self.assertReadsFrom('default')
+            return HttpResponse()
+
+        self.request(view, **{replicas.PIN_COOKIE: '1'})
+
+    def test_unreachable_replica_falls_back(self):
+        replica = connections[replicas.REPLICA]
+        now = 1_000.0
+        with mock.patch.object(replicas.time, 'monotonic', side_effect=lambda: now), \
+                mock.patch.object(replica, 'ensure_connection', side_effect=OperationalError) as connect, \
+                self.assertLogs(replicas.logger, 'WARNING'), replicas.reads():
+            self.assertReadsFrom('default')
+            now += settings.REPLICA_RETRY_SECONDS - 1
+            self.assertReadsFrom('default')
+            self.assertEqual(connect.call_count, 1)  # Not retried yet
+            now += 1
+            connect.side_effect = None
+            self.assertTrue(replicas.available())
+            self.assertEqual(connect.call_count, 2)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RollupTests(TestCase):
+    """After every kind of order change the daily rollups equal a from-scratch aggregate of the order items"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pw', user_type='admin')
+        cls.customer = User.objects.create_user('customer', 'customer@example.com', 'pw')
+        seller = User.objects.create_user('seller', 'seller@example.com', 'pw', user_type='seller')
+        other_seller = User.objects.create_user('other', 'other@example.com', 'pw', user_type='seller')
+        cattle = Category.objects.create(name='Cattle')
+        goats = Category.objects.create(name='Goats')
+        cls.products = [
+            Product.objects.create(
+                seller=owner, category=category, name=name, description=name,
+                price=Decimal(price), stock_quantity=50, livestock_type='cattle',
+            )
+            for owner, category, name, price in [
+                (seller, cattle, 'Cow', '100.00'),
+                (other_seller, cattle, 'Bull', '250.00'),
+                (seller, goats, 'Goat', '40.00'),
+            ]
+        ]
+
+    def place(self, *lines):
+        """Create an order of (product, quantity) lines the way checkout does"""
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            order = Order.objects.create(
+                customer=self.customer, total_amount=sum(p.price * q for p, q in lines),
+                shipping_address='KG 1 Ave', shipping_city='Kigali', shipping_phone='0788000000',
+            )
+            for product, quantity in lines:
+                OrderItem.objects.create(order=order, product=product, quantity=quantity, price=product.price)
+        return order
+
+    def from_scratch(self):
+        """{rollup model: {(date, key): totals}} recomputed from every order item"""
+        expected = {model: {} for model, _, _ in rollups.ROLLUPS}
+        for item in OrderItem.objects.select_related('order', 'product'):
+            statuses = {item.status, item.order.status}
+            if 'cancelled' in statuses:
+                continue
+            keys = {'seller_id': item.product.seller_id, 'product_id': item.product_id, 'category_id': item.product.category_id}
+            for model, key, _ in rollups.ROLLUPS:
+                totals = expected[model].setdefault((rollups.local_date(item.order.created_at), keys[key]), {
+                    'revenue': Decimal('0.00'), 'orders': set(), 'units': 0,
+                    'delivered_revenue': Decimal('0.00'), 'delivered_orders': set(), 'delivered_units': 0,
+                })
+                prefixes = ['', 'delivered_'] if 'delivered' in statuses else ['']
+                for prefix in prefixes:
+                    totals[f'{prefix}revenue'] += item.quantity * item.price
+                    totals[f'{prefix}orders'].add(item.order_id)
+                    totals[f'{prefix}units'] += item.quantity
+        for rows in expected.values():
+            for totals in rows.values():
+                totals['orders'] = len(totals['orders'])
+                totals['delivered_orders'] = len(totals['delivered_orders'])
+        return expected
+
+    def assertRollupsCurrent(self):
+        fields = ['revenue', 'orders', 'units', 'delivered_revenue', 'delivered_orders', 'delivered_units']
+        for model, key, _ in rollups.ROLLUPS:
+            stored = {
+                (row['date'], row[key]): {field: row[field] for field in fields}
+                for row in model.objects.values('date', key, *fields)
+            }
+            self.assertEqual(stored, self.from_scratch()[model], model.__name__)
+
+    def test_checkout(self):
+        cart = Cart.objects.create(user=self.customer)
+        for product, quantity in zip(self.products, (2, 1, 3)):
+            CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+        self.place((self.products[0], 1))
+        self.client.force_login(self.customer)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('marketplace:checkout'), {
+                'shipping_address': 'KG 1 Ave', 'shipping_city': 'Kigali', 'customer_phone': '0788000000',
+                'payment_method': 'mtn', 'mtn_phone': '0788000000',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(OrderItem.objects.count(), 4)
+        self.assertRollupsCurrent()
+
+    def test_cancel_and_restore(self):
+        order = self.place((self.products[0], 2), (self.products[2], 1))
+        self.place((self.products[0], 1))
+        for status in ['cancelled', 'pending', 'delivered']:
+            order.status = status
+            with self.captureOnCommitCallbacks(execute=True):
+                order.save(update_fields=['status'])
+            self.assertRollupsCurrent()
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'cancelled'
+            order.save()
+        self.assertRollupsCurrent()
+
+    def test_item_cancelled_and_deleted(self):
+        order = self.place((self.products[0], 2), (self.products[1], 1), (self.products[2], 4))
+        first, second, third = order.items.order_by('pk')
+        first.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            first.save()
+        self.assertRollupsCurrent()
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertRollupsCurrent()
+        with self.captureOnCommitCallbacks(execute=True):
+            third.delete()
+        self.assertRollupsCurrent()
+        self.assertFalse(rollups.DailyCategorySales.objects.exists())
+
+    def test_transition_orders(self):
+        orders = [self.place((self.products[0], 1), (self.products[2], 2)) for _ in range(3)]
+        self.place((self.products[1], 1))
+        ids = [order.pk for order in orders]
+        for status in ['shipped', 'delivered']:
+            with self.captureOnCommitCallbacks(execute=True):
+                actions.transition_orders(self.admin, ids[:2], status)
+            self.assertRollupsCurrent()
+        with self.captureOnCommitCallbacks(execute=True):
+            actions.transition_orders(self.admin, ids, 'cancelled')
+        self.assertEqual(Order.objects.filter(status='cancelled').count(), 1)  # Delivered orders can not be cancelled
+        self.assertRollupsCurrent()
@@ -0,0 +1,179 @@
+"""Time-series bucketing for report charts.
+
+Buckets any queryset by day, week, calendar month, quarter or year in the site
+timezone (TIME_ZONE) with a single Trunc + GROUP BY query, then fills the empty
+buckets in Python so charts always get a continuous axis. Granularity keys
+match Report.REPORT_PERIODS; 'custom' ranges pick one from the range length.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, DateTimeField, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncQuarter, TruncWeek, TruncYear
+from django.utils import timezone
+
+from . import rollups
+
+GRANULARITIES = {
+    'daily': TruncDay,
+    'weekly': TruncWeek,
+    'monthly': TruncMonth,
+    'quarterly': TruncQuarter,
+    'yearly': TruncYear,
+}
+
+LABEL_FORMATS = {
+    'daily': '%d %b',
+    'weekly': '%d %b',
+    'monthly': '%b %Y',
+    'quarterly': None,  # Built by label()
+    'yearly': '%Y',
+}
+
+
+def bucket_start(day, granularity):
+    """Return the first date of the bucket containing day"""
+    if granularity == 'daily':
+        return day
+    if granularity == 'weekly':
+        return day - timedelta(days=day.weekday())  # TruncWeek uses ISO (Monday) weeks
+    if granularity == 'monthly':
+        return day.replace(day=1)
+    if granularity == 'quarterly':
+        return day.replace(month=3 * ((day.month - 1) // 3) + 1, day=1)
+    if granularity == 'yearly':
+        return day.replace(month=1, day=1)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def shift(start, granularity, count=1):
+    """Move a bucket start forwards (or backwards) by count buckets"""
+    if granularity == 'daily':
+        return start + timedelta(days=count)
+    if granularity == 'weekly':
+        return start + timedelta(weeks=count)
+
+    months = {'monthly': 1, 'quarterly': 3, 'yearly': 12}[granularity] * count
+    index = start.year * 12 + start.month - 1 + months
+    return start.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def window_start(day, granularity, count):
+    """First date of a window of count buckets ending with the bucket containing day"""
+    return shift(bucket_start(day, granularity), granularity, -(count - 1))
+
+
+def bucket_range(start, end, granularity):
+    """Every bucket start from the bucket containing start to the one containing end"""
+    current = bucket_start(start, granularity)
+    buckets = []
+    while current <= end:
+        buckets.append(current)
+        current = shift(current, granularity)
+    return buckets
+
+
+def label(bucket, granularity):
+    if granularity == 'quarterly':
+        return f"Q{(bucket.month - 1) // 3 + 1} {bucket.year}"
+    return bucket.strftime(LABEL_FORMATS[granularity])
+
+
+def granularity_for_range(start, end):
+    """Pick a bucket size that gives a readable number of points for a custom range"""
+    days = (end - start).days + 1
+    if days <= 31:
+        return 'daily'
+    if days <= 26 * 7:
+        return 'weekly'
+    if days <= 3 * 366:
+        return 'monthly'
+    return 'quarterly'
+
+
+def resolve_granularity(period, start, end):
+    """Map a Report period (including 'custom') to a granularity"""
+    if period in GRANULARITIES:
+        return period
+    return granularity_for_range(start, end)
+
+
+def _field(model, path):
+    field = None
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        model = field.related_model
+    return field
+
+
+def series(queryset, date_field, granularity, start, end, **measures):
+    """Aggregate queryset into buckets between two local dates (inclusive)
+
+    date_field may be a DateField (e.g. a rollup's date) or a DateTimeField,
+    which is truncated in the site timezone. measures are aggregate expressions
+    keyed by output name. Returns one dict per bucket, oldest first, with
+    'period', 'label' and every measure (0 for empty buckets).
+    """
+    trunc = GRANULARITIES[granularity]
+
+    if isinstance(_field(queryset.model, date_field), DateTimeField):
+        range_start, _ = rollups.day_bounds(start)
+        _, range_end = rollups.day_bounds(end)
+        queryset = queryset.filter(**{
+            f'{date_field}__gte': range_start,
+            f'{date_field}__lt': range_end,
+        })
+        bucket = trunc(date_field, output_field=DateField(), tzinfo=timezone.get_default_timezone())
+    else:
+        queryset = queryset.filter(**{f'{date_field}__range': [start, end]})
+        bucket = trunc(date_field)
+
+    rows = {
+        row.pop('bucket'): row
+        for row in queryset.order_by().annotate(bucket=bucket).values('bucket').annotate(**measures)
+    }
+
+    points = []
+    for period in bucket_range(start, end, granularity):
+        row = rows.get(period, {})
+        point = {'period': period, 'label': label(period, granularity)}
+        for name in measures:
+            point[name] = row.get(name) or 0
+        points.append(point)
+    return points
+
+
+def seller_sales(seller, granularity, start, end):
+    """Revenue, orders and units sold for one seller, read from the daily rollups"""
+    from .models import DailySellerSales
+    return series(
+        DailySellerSales.objects.filter(seller=seller), 'date', granularity, start, end,
+        revenue=Sum('revenue'),
+        orders=Sum('orders'),
+        units=Sum('units'),
+    )
+
+
+def platform_sales(granularity, start, end):
+    """Revenue, orders and units sold across the platform
+
+    Reads order items directly because an order containing several sellers'
+    products would be counted once per seller in the rollups.
+    """
+    return series(
+        rollups.sales_items(), 'order__created_at', granularity, start, end,
+        revenue=Coalesce(Sum(rollups.LINE_TOTAL), Decimal('0.00')),
+        orders=Count('order', distinct=True),
+        units=Sum('quantity'),
+    )
+
+
+def as_json(points):
+    """Make series points JSON-serialisable"""
+    return [
+        {
+            key: value.isoformat() if key == 'period' else float(value) if isinstance(value, Decimal) else value
+            for key, value in point.items()
+        }
+        for point in points
+    ]
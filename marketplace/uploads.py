@@ -0,0 +1,156 @@
+"""Resumable, chunked image uploads for sellers on unstable connections.
+
+A 10 MB photo sent as one multipart POST has to start over whenever the
+connection drops. Instead the client:
+
+1. POSTs filename, size and the sha256 of the whole file to
+   seller/uploads/, getting back an upload id and the chunk size;
+2. PUTs the file in order, one chunk per request, to seller/uploads/<id>/
+   with the chunk's offset in X-Upload-Offset and its sha256 in
+   X-Chunk-SHA256. A chunk that does not match its checksum is discarded;
+   after a dropped connection, GET seller/uploads/<id>/ returns the offset
+   to resume from;
+3. POSTs product_id and field (image, image2 or image3) to
+   seller/uploads/<id>/finalize/, which attaches the assembled file to the
+   product and hands it to the image workers like any other upload.
+
+Chunks are streamed from the request into a temporary file in
+CHUNKED_UPLOAD_DIR and only appended to the upload's partial file once they
+match their checksum, with the upload row locked, so concurrent retries of
+a chunk can not interleave. The finished file is checked against the whole
+file's sha256 and streamed into media storage, so no request holds more
+than a small buffer in memory.
+Abandoned uploads are removed by the clear_stale_uploads command.
+"""
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.validators import get_available_image_extensions
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from .models import ChunkedUpload
+from .storage import content_hash
+
+IMAGE_FIELDS = ('image', 'image2', 'image3')
+SHA256 = re.compile(r'^[0-9a-f]{64}$')
+BUFFER_SIZE = 64 * 1024
+
+
+def directory():
+    return Path(getattr(settings, 'CHUNKED_UPLOAD_DIR', settings.BASE_DIR / 'upload_chunks'))
+
+
+def chunk_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_CHUNK_SIZE', 1024 * 1024)
+
+
+def max_size():
+    return getattr(settings, 'CHUNKED_UPLOAD_MAX_SIZE', 20 * 1024 * 1024)
+
+
+def partial_path(upload):
+    return directory() / f'{upload.pk}.part'
+
+
+def start(seller, filename, size, sha256=''):
+    """Open an upload of a file of size bytes"""
+    filename = os.path.basename(filename or '').strip()
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    if extension not in get_available_image_extensions():
+        raise ValidationError("Only image files can be uploaded.", code='invalid')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValidationError("File size is required.", code='invalid')
+    if not 0 < size <= max_size():
+        raise ValidationError(f"Files must be smaller than {max_size() // (1024 * 1024)} MB.", code='invalid')
+    sha256 = (sha256 or '').lower()
+    if not SHA256.match(sha256):
+        raise ValidationError("sha256 of the whole file is required, as 64 hex digits.", code='invalid')
+
+    upload = ChunkedUpload.objects.create(seller=seller, filename=filename[-255:], size=size, sha256=sha256)
+    directory().mkdir(parents=True, exist_ok=True)
+    partial_path(upload).touch()
+    return upload
+
+
+def write_chunk(upload, offset, stream, length, checksum):
+    """Append length bytes read from stream at offset, if they match their sha256 checksum"""
+    if offset != upload.offset:
+        raise ValidationError(f"Expected the chunk at offset {upload.offset}.", code='conflict')
+    if not 0 < length <= chunk_size() or offset + length > upload.size:
+        raise ValidationError(f"Chunks must be at most {chunk_size()} bytes and end within the file.", code='invalid')
+    if not SHA256.match((checksum or '').lower()):
+        raise ValidationError("X-Chunk-SHA256 must be the chunk's sha256 in hex.", code='invalid')
+
+    digest = hashlib.sha256()
+    with tempfile.TemporaryFile(dir=directory(), suffix='.chunk') as chunk:
+        received = 0
+        while received < length:
+            block = stream.read(min(BUFFER_SIZE, length - received))
+            if not block:
+                break
+            digest.update(block)
+            chunk.write(block)
+            received += len(block)
+        if received != length or digest.hexdigest() != checksum.lower():
+            raise ValidationError("Chunk did not match its checksum; send it again.", code='checksum')
+
+        # Only a verified chunk reaches the partial file, one writer at a time
+        with transaction.atomic():
+            current = ChunkedUpload.objects.select_for_update().filter(pk=upload.pk).values_list('offset', flat=True).first()
+            if current != offset:
+                upload.offset = current or 0
+                raise ValidationError(f"Expected the chunk at offset {upload.offset}.", code='conflict')
+            chunk.seek(0)
+            with open(partial_path(upload), 'r+b') as partial:
+                partial.truncate(offset)  # Drop whatever an interrupted append left behind
+                partial.seek(offset)
+                shutil.copyfileobj(chunk, partial, BUFFER_SIZE)
+            ChunkedUpload.objects.filter(pk=upload.pk).update(offset=offset + length, updated_at=timezone.now())
+    upload.offset = offset + length
+
+
+def finish(upload, product, field):
+    """Attach a completely received upload to one of the product's image fields"""
+    if field not in IMAGE_FIELDS:
+        raise ValidationError("Unknown image field.", code='invalid')
+    if upload.offset != upload.size:
+        raise ValidationError(f"Upload incomplete: {upload.offset} of {upload.size} bytes received.", code='conflict')
+
+    error = None
+    with open(partial_path(upload), 'rb') as partial:
+        file = File(partial, name=upload.filename)
+        if content_hash(file) != upload.sha256:
+            error = ValidationError("The assembled file does not match its checksum; upload it again.", code='checksum')
+        else:
+            try:
+                Image.open(partial).verify()
+            except Exception:
+                error = ValidationError("The uploaded file is not a valid image.", code='invalid')
+        if error is None:
+            file.seek(0)
+            with transaction.atomic():
+                getattr(product, field).save(upload.filename, file, save=False)
+                product.save(update_fields=[field, 'updated_at'])
+    discard(upload)
+    if error is not None:
+        raise error
+
+
+def discard(upload):
+    partial_path(upload).unlink(missing_ok=True)
+    upload.delete()
+
+
+def state(upload):
+    return {'upload_id': str(upload.pk), 'offset': upload.offset, 'size': upload.size, 'chunk_size': chunk_size()}
@@ -25,6 +25,11 @@ urlpatterns = [
     path('products/delete/<int:product_id>/', views.delete_product, name='delete_product'),
     path('products/delete/<int:product_id>/', views.delete_product, name='delete_product'),
     path('products/toggle-status/<int:product_id>/', views.toggle_product_status, name='toggle_product_status'),
+
+    # Resumable image uploads
+    path('seller/uploads/', views.start_upload, name='start_upload'),
+    path('seller/uploads/<uuid:upload_id>/', views.upload_chunk, name='upload_chunk'),
+    path('seller/uploads/<uuid:upload_id>/finalize/', views.finalize_upload, name='finalize_upload'),
     
     # Order status updates
     path('seller/orders/update-status/<int:order_id>/', views.update_order_status, name='update_order_status'),
@@ -55,4 +60,5 @@ urlpatterns = [
     path('reports/admin/', views.admin_reports, name='admin_reports'),
     path('reports/generate-sales/', views.generate_sales_report, name='generate_sales_report'),
     path('reports/generate-admin/', views.generate_admin_report, name='generate_admin_report'),
+    path('reports/jobs/<uuid:job_id>/', views.report_job_status, name='report_job_status'),
 ]
\ No newline at end of file
@@ -3,17 +3,26 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q
 from django.http import JsonResponse
+from django.urls import reverse
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
-from .models import Product, Category, Cart, CartItem
+from .models import Product, Category, Cart, CartItem, ChunkedUpload, Report, ReportJob, DailySellerSales, DailyProductSales, DailyCategorySales, SellerLeaderboard
 from .forms import ProductForm, ProductSearchForm, CheckoutForm, CategoryForm
+from . import forecasting, jobs, kpis, leaderboard, reports, timeseries, uploads
+from accounts import phones
+from livestockhub import replicas
 from orders.models import Order, OrderItem, Notification
 import json
-from django.db.models import Sum, Count, Avg
+from django.db.models import Sum, Count
+from django.db import transaction
+from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta
 from decimal import Decimal
 
 
+@replicas.read_only
 def home(request):
     """Home page with featured products and categories"""
     categories = Category.objects.filter(parent__isnull=True, is_active=True)[:6]
@@ -41,15 +50,7 @@ def customer_dashboard(request):
             return redirect('marketplace:home')
     
     # Check if phone is set
-    phone_set = False
-    if request.session.get('user_phone'):
-        phone_set = True
-    else:
-        # Check if user has any orders with phone numbers
-        has_orders_with_phone = Order.objects.filter(
-            customer=request.user
-        ).exclude(customer_phone='').exists()
-        phone_set = has_orders_with_phone
+    phone_set = bool(request.user.phone_number)
     
     # Get customer's recent orders
     recent_orders = Order.objects.filter(customer=request.user).order_by('-created_at')[:5]
@@ -99,8 +100,8 @@ def seller_dashboard(request):
     total_products = seller_products.count()
     active_products = seller_products.filter(is_active=True).count()
     
-    # Low stock products (less than 10 items)
-    low_stock_products = seller_products.filter(stock_quantity__lt=10)
+    # Products at or below their forecast reorder point
+    low_stock_products = forecasting.low_stock(seller_products).order_by('forecast__days_of_stock')
     
     # Calculate both TOTAL SALES (count) and TOTAL REVENUE (money) from DELIVERED orders
     from django.db.models.functions import Coalesce
@@ -203,7 +204,9 @@ def update_order_status(request, order_id):
         # Define valid statuses
         valid_statuses = ['pending', 'confirmed', 'processing', 'shipped', 'delivered', 'cancelled']
         
-        if new_status in valid_statuses:
+        if new_status in valid_statuses and not order.can_transition(new_status):
+            messages.error(request, f"An order can not go from {order.status} to {new_status}.")
+        elif new_status in valid_statuses:
             old_status = order.status
             order.status = new_status
             order.save()
@@ -310,6 +313,7 @@ def manage_categories(request):
     }
     return render(request, 'marketplace/manage_categories.html', context)
 
+@replicas.read_only
 def product_list(request):
     """List all active products with filtering"""
     products = Product.objects.filter(is_active=True)
@@ -354,6 +358,7 @@ def product_list(request):
     }
     return render(request, 'marketplace/product_list.html', context)
 
+@replicas.read_only
 def product_detail(request, product_id):
     """Product detail view"""
     product = get_object_or_404(Product, id=product_id, is_active=True)
@@ -368,6 +373,7 @@ def product_detail(request, product_id):
     }
     return render(request, 'marketplace/product_detail.html', context)
 
+@replicas.read_only
 def get_category_types(request, category_id):
     """API endpoint to get category types/subcategories"""
     category = get_object_or_404(Category, id=category_id, is_active=True)
@@ -414,6 +420,7 @@ def seller_order_detail(request, order_id):
     }
     return render(request, 'marketplace/seller_order_detail.html', context)
 
+@replicas.read_only
 def search_categories(request):
     """API endpoint to search categories"""
     query = request.GET.get('q', '')
@@ -437,6 +444,7 @@ def search_categories(request):
     
     return JsonResponse({'results': results})
 
+@replicas.read_only
 def get_subcategories(request, category_id):
     """API endpoint to get subcategories for a category"""
     category = get_object_or_404(Category, id=category_id, is_active=True)
@@ -473,7 +481,10 @@ def add_product(request):
         if form.is_valid():
             try:
                 product = form.save()
-                messages.success(request, "Product added successfully!")
+                if product.image_status == 'processing':
+                    messages.success(request, "Product added successfully! Its photos will appear once they have been processed.")
+                else:
+                    messages.success(request, "Product added successfully!")
                 return redirect('marketplace:seller_products')
 
             except Exception as e:
@@ -509,8 +520,11 @@ def edit_product(request, product_id):
     if request.method == 'POST':
         form = ProductForm(request.POST, request.FILES, instance=product, user=request.user)
         if form.is_valid():
-            form.save()
-            messages.success(request, "Product updated successfully!")
+            product = form.save()
+            if product.image_status == 'processing':
+                messages.success(request, "Product updated successfully! New photos will appear once they have been processed.")
+            else:
+                messages.success(request, "Product updated successfully!")
             return redirect('marketplace:seller_products')
     else:
         form = ProductForm(instance=product, user=request.user)
@@ -521,6 +535,75 @@ def edit_product(request, product_id):
     }
     return render(request, 'marketplace/edit_product.html', context)
 
+UPLOAD_ERROR_STATUS = {'conflict': 409, 'checksum': 422}
+
+def upload_error(error, upload=None):
+    """JSON for a failed upload step; conflicts carry the offset to resume from"""
+    response = {'success': False, 'error': error.messages[0]}
+    if upload is not None:
+        response['offset'] = upload.offset
+    return JsonResponse(response, status=UPLOAD_ERROR_STATUS.get(error.code, 400))
+
+def seller_upload(request, upload_id):
+    """The calling seller's upload, or None"""
+    if request.user.user_type != 'seller' or not request.user.is_seller_approved:
+        return None
+    return ChunkedUpload.objects.filter(pk=upload_id, seller=request.user).first()
+
+@login_required
+def start_upload(request):
+    """Begin a resumable image upload, see marketplace.uploads"""
+    if request.user.user_type != 'seller' or not request.user.is_seller_approved:
+        return JsonResponse({'success': False, 'error': 'Access denied'}, status=403)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=405)
+
+    try:
+        upload = uploads.start(request.user, request.POST.get('filename'), request.POST.get('size'), request.POST.get('sha256'))
+    except ValidationError as e:
+        return upload_error(e)
+    return JsonResponse({'success': True, **uploads.state(upload)}, status=201)
+
+@login_required
+def upload_chunk(request, upload_id):
+    """GET the offset to resume from, or PUT the next chunk of an upload"""
+    upload = seller_upload(request, upload_id)
+    if upload is None:
+        return JsonResponse({'success': False, 'error': 'Upload not found'}, status=404)
+    if request.method == 'PUT':
+        try:
+            offset = int(request.headers.get('X-Upload-Offset', ''))
+            length = int(request.headers.get('Content-Length', ''))
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'X-Upload-Offset and Content-Length are required'}, status=400)
+        try:
+            uploads.write_chunk(upload, offset, request, length, request.headers.get('X-Chunk-SHA256'))
+        except ValidationError as e:
+            return upload_error(e, upload)
+    elif request.method != 'GET':
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=405)
+    return JsonResponse({'success': True, **uploads.state(upload)})
+
+@login_required
+def finalize_upload(request, upload_id):
+    """Attach a completed upload to a product's image field"""
+    upload = seller_upload(request, upload_id)
+    if upload is None:
+        return JsonResponse({'success': False, 'error': 'Upload not found'}, status=404)
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'}, status=405)
+
+    product = get_object_or_404(Product, id=request.POST.get('product_id') or 0, seller=request.user)
+    try:
+        uploads.finish(upload, product, request.POST.get('field', 'image'))
+    except ValidationError as e:
+        return upload_error(e, upload)
+    return JsonResponse({
+        'success': True,
+        'product_id': product.id,
+        'image_status': product.image_status,
+    })
+
 @login_required
 def delete_product(request, product_id):
     """Delete product"""
@@ -587,7 +670,7 @@ def seller_products(request):
     # Filter by stock level
     stock_filter = request.GET.get('stock', '')
     if stock_filter == 'low':
-        products = products.filter(stock_quantity__lt=10)
+        products = forecasting.low_stock(products)
     elif stock_filter == 'out':
         products = products.filter(stock_quantity=0)
 
@@ -614,7 +697,7 @@ def seller_products(request):
     total_products = products.count()
     active_products = products.filter(is_active=True).count()
     inactive_products = products.filter(is_active=False).count()
-    low_stock_products = products.filter(stock_quantity__lt=10).count()
+    low_stock_products = forecasting.low_stock(products).count()
 
     context = {
         'products': page_obj,
@@ -633,6 +716,7 @@ def seller_products(request):
     }
     return render(request, 'marketplace/seller_products.html', context)
 
+@replicas.read_only
 def category_products(request, category_id):
     """Display products by category including subcategories"""
     category = get_object_or_404(Category, id=category_id, is_active=True)
@@ -737,36 +821,36 @@ def checkout(request):
                 customer_phone = form.cleaned_data.get('customer_phone', '')
                 shipping_phone = form.cleaned_data.get('shipping_phone', '')
 
-                # Save phone to session for profile completion
-                if customer_phone:
-                    request.session['user_phone'] = customer_phone
-                    request.session.modified = True
-
-                # Create order
-                order = Order.objects.create(
-                    customer=request.user,
-                    total_amount=cart.total_price,
-                    shipping_address=form.cleaned_data['shipping_address'],
-                    shipping_city=form.cleaned_data['shipping_city'],
-                    shipping_phone=shipping_phone,  # This is the delivery phone for sellers to call
-                    customer_phone=customer_phone,  # This is the main customer phone
-                    notes=form.cleaned_data.get('notes', ''),
-                    payment_method=payment_method,
-                    mtn_phone=mtn_phone if payment_method == 'mtn' else ''
-                )
-
-                # Create order items and reduce stock
-                for cart_item in cart.items.all():
-                    OrderItem.objects.create(
-                        order=order,
-                        product=cart_item.product,
-                        quantity=cart_item.quantity,
-                        price=cart_item.product.price
+                # Create order, its items and stock changes together
+                with transaction.atomic():
+                    # Save phone to the account for profile completion
+                    if customer_phone and not request.user.phone_number:
+                        phones.set_customer_phone(request.user, customer_phone)
+
+                    order = Order.objects.create(
+                        customer=request.user,
+                        total_amount=cart.total_price,
+                        shipping_address=form.cleaned_data['shipping_address'],
+                        shipping_city=form.cleaned_data['shipping_city'],
+                        shipping_phone=shipping_phone,  # This is the delivery phone for sellers to call
+                        customer_phone=customer_phone,  # This is the main customer phone
+                        notes=form.cleaned_data.get('notes', ''),
+                        payment_method=payment_method,
+                        mtn_phone=mtn_phone if payment_method == 'mtn' else ''
                     )
-                    cart_item.product.reduce_stock(cart_item.quantity)
 
-                # Clear cart
-                cart.items.all().delete()
+                    # Create order items and reduce stock
+                    for cart_item in cart.items.all():
+                        OrderItem.objects.create(
+                            order=order,
+                            product=cart_item.product,
+                            quantity=cart_item.quantity,
+                            price=cart_item.product.price
+                        )
+                        cart_item.product.reduce_stock(cart_item.quantity)
+
+                    # Clear cart
+                    cart.items.all().delete()
 
                 # Payment-specific success messages
                 if payment_method == 'mtn':
@@ -789,22 +873,10 @@ def checkout(request):
         # Pre-fill form with available data
         initial_data = {}
         
-        # Get phone from session or previous orders
-        if request.session.get('user_phone'):
-            initial_data['customer_phone'] = request.session['user_phone']
-            # For shipping phone, use the same OR leave empty for customer to specify different delivery phone
-            initial_data['shipping_phone'] = ''  # Leave empty so customer can enter specific delivery phone
-        else:
-            # Try to get phone from most recent order
-            recent_order = Order.objects.filter(customer=request.user).exclude(customer_phone='').order_by('-created_at').first()
-            if recent_order and recent_order.customer_phone:
-                initial_data['customer_phone'] = recent_order.customer_phone
-                initial_data['shipping_phone'] = ''  # Leave empty for delivery phone
-                request.session['user_phone'] = recent_order.customer_phone
-            else:
-                # No phone found - both fields will be empty
-                initial_data['customer_phone'] = ''
-                initial_data['shipping_phone'] = ''
+        # Pre-fill the account phone; the delivery phone is left empty so the
+        # customer can give a different number for delivery
+        initial_data['customer_phone'] = request.user.phone_number
+        initial_data['shipping_phone'] = ''
         
         form = CheckoutForm(initial=initial_data)
     
@@ -868,6 +940,7 @@ def sitemap(request):
 
 # Reporting Views
 @login_required
+@replicas.read_only
 def seller_reports(request):
     """Seller reporting dashboard with real data"""
     if request.user.user_type != 'seller':
@@ -880,64 +953,49 @@ def seller_reports(request):
         return redirect('marketplace:home')
 
     # Calculate date ranges
-    today = timezone.now().date()
+    today = timezone.localdate()
     thirty_days_ago = today - timedelta(days=30)
-    seven_days_ago = today - timedelta(days=7)
-    
-    # Get seller's products
-    seller_products = Product.objects.filter(seller=request.user)
-    
-    # Get orders for this seller
-    seller_orders = Order.objects.filter(
-        items__product__in=seller_products
-    ).distinct()
-    
-    # Recent orders (last 30 days)
-    recent_orders = seller_orders.filter(created_at__date__gte=thirty_days_ago)
     
-    # Calculate metrics
-    total_revenue = recent_orders.aggregate(
-        total=Sum('total_amount')
-    )['total'] or Decimal('0')
+    # Pre-aggregated daily totals for this seller (see marketplace.rollups)
+    seller_sales = DailySellerSales.objects.filter(seller=request.user)
     
-    total_orders = recent_orders.count()
-    
-    # Calculate products sold
-    products_sold = OrderItem.objects.filter(
-        order__in=recent_orders,
-        product__in=seller_products
-    ).aggregate(total_sold=Sum('quantity'))['total_sold'] or 0
+    # Calculate metrics (last 30 days)
+    totals = seller_sales.filter(date__gte=thirty_days_ago).aggregate(
+        revenue=Sum('revenue'),
+        orders=Sum('orders'),
+        units=Sum('units'),
+    )
+    total_revenue = totals['revenue'] or Decimal('0')
+    total_orders = totals['orders'] or 0
+    products_sold = totals['units'] or 0
     
     avg_order_value = total_revenue / total_orders if total_orders > 0 else Decimal('0')
     
     # Top products
-    top_products = OrderItem.objects.filter(
-        order__in=recent_orders,
-        product__in=seller_products
+    top_products = DailyProductSales.objects.filter(
+        seller=request.user,
+        date__gte=thirty_days_ago
     ).values(
         'product__name',
         'product__id'
     ).annotate(
-        total_sold=Sum('quantity'),
-        total_revenue=Sum('price')
+        total_sold=Sum('units'),
+        total_revenue=Sum('revenue')
     ).order_by('-total_sold')[:5]
     
-    # Revenue by month (last 6 months)
-    revenue_by_month = []
-    for i in range(6):
-        month_start = today.replace(day=1) - timedelta(days=30*i)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        
-        monthly_revenue = seller_orders.filter(
-            created_at__date__range=[month_start, month_end]
-        ).aggregate(total=Sum('total_amount'))['total'] or Decimal('0')
-        
-        revenue_by_month.append({
-            'month': month_start.strftime('%b'),
-            'revenue': float(monthly_revenue)
-        })
+    # Revenue by calendar month (last 6 months)
+    revenue_by_month = [
+        {'month': point['label'], 'revenue': float(point['revenue'])}
+        for point in timeseries.seller_sales(
+            request.user, 'monthly', timeseries.window_start(today, 'monthly', 6), today
+        )
+    ]
     
-    revenue_by_month.reverse()
+    # Recent orders (last 30 days)
+    recent_orders = Order.objects.filter(
+        items__product__seller=request.user,
+        created_at__date__gte=thirty_days_ago
+    ).distinct().select_related('customer').prefetch_related('items__product').order_by('-created_at')
     
     context = {
         'total_revenue': total_revenue,
@@ -951,6 +1009,7 @@ def seller_reports(request):
     return render(request, 'marketplace/seller_reports.html', context)
 
 @login_required
+@replicas.read_only
 def admin_reports(request):
     """Admin reporting dashboard with real data"""
     # Check if user is admin/staff
@@ -958,77 +1017,71 @@ def admin_reports(request):
         messages.error(request, "Access denied. Admin privileges required.")
         return redirect('marketplace:home')
     
-    today = timezone.now().date()
+    today = timezone.localdate()
     thirty_days_ago = today - timedelta(days=30)
     
-    # Platform metrics
-    total_revenue = Order.objects.aggregate(
-        total=Sum('total_amount')
-    )['total'] or Decimal('0')
-    
-    total_orders = Order.objects.count()
-    
-    # User metrics
-    from django.contrib.auth.models import User
-    total_users = User.objects.count()
-    active_users = User.objects.filter(
-        last_login__date__gte=thirty_days_ago
-    ).count()
-    
-    # Product metrics
-    total_products = Product.objects.count()
-    active_products = Product.objects.filter(is_active=True).count()
-    low_stock_products = Product.objects.filter(stock_quantity__lt=10).count()
-    
-    # Seller metrics
-    active_sellers = User.objects.filter(
-        products__isnull=False,
-        last_login__date__gte=thirty_days_ago
-    ).distinct().count()
+    # Platform counters (cached KPI snapshot)
+    snapshot = kpis.snapshot()
+    User = get_user_model()
     
     # Revenue by category
-    revenue_by_category = OrderItem.objects.values(
-        'product__category__name'
+    revenue_by_category = DailyCategorySales.objects.values(
+        'category__name'
     ).annotate(
-        revenue=Sum('price'),
-        orders=Count('order')
+        revenue=Sum('revenue'),
+        orders=Sum('orders')
     ).order_by('-revenue')[:6]
     
-    # Top sellers
-    top_sellers = User.objects.filter(
-        products__order_items__isnull=False
-    ).annotate(
-        total_revenue=Sum('products__order_items__price'),
-        total_orders=Count('products__order_items__order', distinct=True),
-        avg_rating=Avg('products__reviews__rating')
-    ).filter(
-        total_revenue__isnull=False
-    ).order_by('-total_revenue')[:5]
+    # Top sellers by delivered revenue (materialised leaderboard)
+    leaderboard_period = request.GET.get('leaderboard', 'all')
+    if leaderboard_period not in dict(SellerLeaderboard.PERIOD_CHOICES):
+        leaderboard_period = 'all'
+    leaderboard.ensure_current()
+    top_sellers = leaderboard.top(leaderboard_period)
+    
+    # Revenue trend by calendar month (last 12 months)
+    revenue_trend = [
+        {'month': point['label'], 'revenue': float(point['revenue']), 'orders': point['orders']}
+        for point in timeseries.platform_sales(
+            'monthly', timeseries.window_start(today, 'monthly', 12), today
+        )
+    ]
     
     # Recent platform activity
     recent_orders = Order.objects.select_related('customer').order_by('-created_at')[:5]
     new_sellers = User.objects.filter(
-        products__isnull=False,
+        product__isnull=False,
         date_joined__date__gte=thirty_days_ago
     ).distinct()[:3]
     
     context = {
-        'total_revenue': total_revenue,
-        'total_orders': total_orders,
-        'total_users': total_users,
-        'active_users': active_users,
-        'total_products': total_products,
-        'active_products': active_products,
-        'low_stock_products': low_stock_products,
-        'active_sellers': active_sellers,
+        'total_revenue': snapshot['total_revenue'],
+        'total_orders': snapshot['total_orders'],
+        'total_users': snapshot['total_users'],
+        'active_users': snapshot['active_users'],
+        'total_products': snapshot['total_products'],
+        'active_products': snapshot['active_products'],
+        'low_stock_products': snapshot['low_stock_products'],
+        'active_sellers': snapshot['active_sellers'],
         'revenue_by_category': revenue_by_category,
+        'revenue_trend': revenue_trend,
         'top_sellers': top_sellers,
+        'leaderboard_period': leaderboard_period,
+        'leaderboard_periods': SellerLeaderboard.PERIOD_CHOICES,
         'recent_orders': recent_orders,
         'new_sellers': new_sellers,
     }
     return render(request, 'marketplace/admin_reports.html', context)
 
+def report_date_range(data):
+    """(start, end) dates from a report form; None for missing or invalid dates such as 2024-02-30"""
+    try:
+        return parse_date(data.get('start_date') or ''), parse_date(data.get('end_date') or '')
+    except ValueError:
+        return None, None
+
 @login_required
+@replicas.read_only
 def generate_sales_report(request):
     """Generate sales report for seller"""
     if request.user.user_type != 'seller':
@@ -1039,38 +1092,23 @@ def generate_sales_report(request):
         return JsonResponse({'success': False, 'error': 'Account pending approval'})
 
     if request.method == 'POST':
-        start_date = request.POST.get('start_date')
-        end_date = request.POST.get('end_date')
+        start_date, end_date = report_date_range(request.POST)
         report_type = request.POST.get('report_type', 'sales')
+        period = request.POST.get('period', 'custom')
         
-        # Get seller's orders in date range
-        seller_products = Product.objects.filter(seller=request.user)
-        orders = Order.objects.filter(
-            items__product__in=seller_products,
-            created_at__date__range=[start_date, end_date]
-        ).distinct()
+        if not start_date or not end_date or start_date > end_date:
+            return JsonResponse({'success': False, 'error': 'Invalid date range'})
+        if report_type not in dict(Report.REPORT_TYPES):
+            return JsonResponse({'success': False, 'error': 'Invalid report type'})
         
-        # Calculate metrics
-        total_sales = orders.count()
-        total_revenue = sum(order.total_amount for order in orders)
-        average_order_value = total_revenue / total_sales if total_sales > 0 else 0
-        
-        # Top products
-        top_products = OrderItem.objects.filter(
-            order__in=orders,
-            product__in=seller_products
-        ).values('product__name').annotate(
-            total_sold=Sum('quantity'),
-            total_revenue=Sum('price')
-        ).order_by('-total_sold')[:5]
+        data = reports.get_or_generate(
+            report_type, period, start_date, end_date,
+            scope=reports.seller_scope(request.user),
+            user=request.user,
+            build=lambda: reports.build_sales_report(request.user, report_type, period, start_date, end_date)
+        )
         
-        return JsonResponse({
-            'success': True, 
-            'total_sales': total_sales,
-            'total_revenue': float(total_revenue),
-            'average_order_value': float(average_order_value),
-            'top_products': list(top_products)
-        })
+        return JsonResponse({'success': True, **data})
     
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
@@ -1081,55 +1119,58 @@ def generate_admin_report(request):
         return JsonResponse({'success': False, 'error': 'Access denied'})
         
     if request.method == 'POST':
-        start_date = request.POST.get('start_date')
-        end_date = request.POST.get('end_date')
+        start_date, end_date = report_date_range(request.POST)
         report_type = request.POST.get('report_type', 'revenue')
+        period = request.POST.get('period', 'custom')
         
-        if report_type == 'revenue':
-            orders = Order.objects.filter(created_at__date__range=[start_date, end_date])
-            total_revenue = orders.aggregate(Sum('total_amount'))['total_amount__sum'] or 0
-            total_orders = orders.count()
-            
-            data = {
-                'total_revenue': float(total_revenue),
-                'total_orders': total_orders,
-                'average_order_value': float(total_revenue / total_orders) if total_orders > 0 else 0
-            }
-        elif report_type == 'users':
-            from django.contrib.auth.models import User
-            new_users = User.objects.filter(date_joined__date__range=[start_date, end_date]).count()
-            data = {'new_users': new_users}
-        else:
-            data = {}
+        if not start_date or not end_date or start_date > end_date:
+            return JsonResponse({'success': False, 'error': 'Invalid date range'})
+        if report_type not in dict(Report.REPORT_TYPES):
+            return JsonResponse({'success': False, 'error': 'Invalid report type'})
+        
+        # Generated in the background; identical in-flight requests share one job
+        job = jobs.start(report_type, period, start_date, end_date, request.user)
         
-        return JsonResponse({'success': True, 'data': data})
+        return JsonResponse({
+            'success': True,
+            'job_id': str(job.pk),
+            'status': job.status,
+            'progress': job.progress,
+            'status_url': reverse('marketplace:report_job_status', args=[job.pk]),
+        })
     
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
+@login_required
+def report_job_status(request, job_id):
+    """Poll a report job for progress and fetch its data once done"""
+    if not request.user.is_staff:
+        return JsonResponse({'success': False, 'error': 'Access denied'})
+    
+    job = get_object_or_404(ReportJob, pk=job_id)
+    
+    response = {
+        'success': True,
+        'job_id': str(job.pk),
+        'status': job.status,
+        'progress': job.progress,
+    }
+    if job.status == 'done':
+        response['data'] = job.data
+    elif job.status == 'failed':
+        response['error'] = job.error or 'Report generation failed'
+    return JsonResponse(response)
+
 # Profile view (add this if it doesn't exist)
 
 @login_required
 def profile(request):
     """User profile management"""
     from django.contrib.auth.forms import UserChangeForm
-    from .forms import PhoneForm
-    
-    # Initialize variables
-    phone_set = False
-    user_phone = request.session.get('user_phone', '')
+    from accounts.forms import PhoneForm
     
-    # Check if phone is set in session or in recent orders
-    if user_phone:
-        phone_set = True
-    else:
-        # Check if user has any orders with phone numbers
-        recent_order_with_phone = Order.objects.filter(
-            customer=request.user
-        ).exclude(customer_phone='').order_by('-created_at').first()
-        if recent_order_with_phone:
-            user_phone = recent_order_with_phone.customer_phone
-            request.session['user_phone'] = user_phone
-            phone_set = True
+    user_phone = request.user.phone_number
+    phone_set = bool(user_phone)
     
     # Handle form submission
     if request.method == 'POST':
@@ -1140,23 +1181,8 @@ def profile(request):
             user_form = UserChangeForm(instance=request.user)
             
             if phone_form.is_valid():
-                phone = phone_form.cleaned_data['phone']
-                
-                # Store phone in session
-                request.session['user_phone'] = phone
-                request.session.modified = True
-                
-                # Update any recent orders without phone numbers
-                orders_without_phone = Order.objects.filter(
-                    customer=request.user,
-                    customer_phone=''
-                )
-                for order in orders_without_phone:
-                    order.customer_phone = phone
-                    order.save()
-                
-                phone_set = True
-                user_phone = phone
+                # Store phone on the account and fill it into orders without one
+                phones.set_customer_phone(request.user, phone_form.cleaned_data['phone'])
                 messages.success(request, 'Phone number saved successfully! Your profile is now complete.')
                 return redirect('marketplace:profile')
             else:
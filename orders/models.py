@@ -54,6 +54,13 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),  # Default sort of the admin order table
+            models.Index(fields=['customer', '-created_at']),  # A customer's order history
+            models.Index(fields=['status', '-created_at']),  # Admin and seller status filters
+        ]
+
     def __str__(self):
         return self.order_number
 
@@ -63,12 +70,28 @@ class Order(models.Model):
             import string
             self.order_number = ''.join(random.choices(string.ascii_uppercase + string.digits, k=10))
         
-        # Auto-populate customer_phone from customer profile if not set
-        if not self.customer_phone and hasattr(self.customer, 'profile'):
-            self.customer_phone = self.customer.profile.phone
+        # Auto-populate customer_phone from the customer's account if not set
+        if not self.customer_phone:
+            self.customer_phone = self.customer.phone_number
         
         super().save(*args, **kwargs)
     
+    # Forward-only fulfilment flow; orders can be cancelled until they ship
+    STATUS_FLOW = ['pending', 'confirmed', 'processing', 'shipped', 'delivered']
+    CANCELLABLE = ['pending', 'confirmed', 'processing']
+
+    @classmethod
+    def allowed_sources(cls, new_status):
+        """Statuses an order may move to new_status from"""
+        if new_status == 'cancelled':
+            return list(cls.CANCELLABLE)
+        if new_status in cls.STATUS_FLOW:
+            return cls.STATUS_FLOW[:cls.STATUS_FLOW.index(new_status)]
+        return []
+
+    def can_transition(self, new_status):
+        return self.status in self.allowed_sources(new_status)
+
     def get_payment_method_display_name(self):
         """Get human-readable payment method name"""
         return dict(self.PAYMENT_METHODS).get(self.payment_method, self.payment_method)
@@ -114,6 +137,10 @@ class OrderItem(models.Model):
     status = models.CharField(max_length=20, choices=ORDER_ITEM_STATUS, default='pending')
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # Seller order views join products to their orders through the items
+        indexes = [models.Index(fields=['product', 'order'])]
+
     def __str__(self):
         return f"{self.quantity} x {self.product.name} for {self.order.order_number}"
 
@@ -131,10 +158,14 @@ class OrderItem(models.Model):
 
 class Notification(models.Model):
     NOTIFICATION_TYPES = (
+        # order_<status> for every order status, see Order.ORDER_STATUS
         ('order_placed', 'Order Placed'),
+        ('order_pending', 'Order Pending'),
         ('order_confirmed', 'Order Confirmed'),
+        ('order_processing', 'Order Processing'),
         ('order_shipped', 'Order Shipped'),
         ('order_delivered', 'Order Delivered'),
+        ('order_cancelled', 'Order Cancelled'),
         ('low_stock', 'Low Stock'),
         ('new_seller', 'New Seller Registration'),
     )